@@ -0,0 +1,46 @@
+"""
+Command-line handling shared by the demo scripts.
+
+Author: Agus Setiawan
+License: GPL-3.0
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+from typing import Callable, List, Optional
+
+
+def no_pause(seconds: float) -> None:
+    """Stand-in for time.sleep when a demo runs non-interactively."""
+
+
+def run_demo_cli(run_demo: Callable[..., None], description: str,
+                 argv: Optional[List[str]] = None):
+    """
+    Parse demo command-line flags and run the demo.
+
+    --interactive keeps the pauses between scenarios so the output can be
+    followed as it appears; without it the demo runs straight through.
+    --quiet buffers all output in memory and writes it once at the end, so
+    terminal I/O does not show up in timing or profiling runs.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--interactive', action='store_true',
+                        help='pause between scenarios')
+    parser.add_argument('--quiet', action='store_true',
+                        help='buffer output and write it once at the end')
+    args = parser.parse_args(argv)
+
+    pause = time.sleep if args.interactive else no_pause
+
+    if not args.quiet:
+        run_demo(pause=pause)
+        return
+
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        run_demo(pause=pause)
+    sys.stdout.write(buf.getvalue())
@@ -0,0 +1,103 @@
+"""
+Exponential moving average kernel for pattern memory.
+
+Folds a sequence of observations into a running mean and variance using
+the same recurrence as PatternMemory's per-observation updates, so a batch
+of observations lands on the same statistics as observing them one at a
+time. A fused temporal variant folds hours of day, which wrap around
+midnight, together with durations. When Numba is installed the loops are
+compiled to native code; otherwise they run as plain Python.
+
+Author: Agus Setiawan
+License: GPL-3.0
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # Numba is an optional accelerator
+    njit = None
+
+
+def _ema_fold_py(x, mean, var, alpha):
+    """
+    Fold observations `x` into an exponential moving mean and variance.
+
+    Args:
+        x: 1-D float64 array of observations, oldest first
+        mean: Current mean
+        var: Current variance
+        alpha: Learning rate
+
+    Returns:
+        Tuple of (mean, var) after all observations
+    """
+    keep = 1.0 - alpha
+
+    for i in range(x.shape[0]):
+        diff = x[i] - mean
+        mean = alpha * x[i] + keep * mean
+        var = alpha * (diff * diff) + keep * var
+
+    return mean, var
+
+
+def _ema_fold_temporal_py(hours, durations, hour_mean, hour_var, duration_mean,
+                          duration_lower_var, duration_upper_var, alpha, period):
+    """
+    Fold paired hour and duration observations into their exponential
+    moving means and variances in a single pass.
+
+    Hours lie on a circle of length `period`: each one is compared with
+    the mean along the shorter way round, so 23:30 and 00:30 average to
+    midnight rather than noon, and the mean stays in [0, period).
+    Durations use the same recurrence as _ema_fold_py, with the variance
+    kept as two semivariances: each squared deviation is added to the side
+    of the mean the duration fell on, and their sum is the variance.
+
+    Args:
+        hours: 1-D float64 array of hours, oldest first
+        durations: 1-D float64 array of durations, same length as `hours`
+        hour_mean: Current hour mean
+        hour_var: Current hour variance
+        duration_mean: Current duration mean
+        duration_lower_var: Current duration semivariance below the mean
+        duration_upper_var: Current duration semivariance above the mean
+        alpha: Learning rate
+        period: Length of the hour circle (24.0 for hours of the day)
+
+    Returns:
+        Tuple of (hour_mean, hour_var, duration_mean, duration_lower_var,
+        duration_upper_var)
+    """
+    keep = 1.0 - alpha
+    half = 0.5 * period
+
+    for i in range(hours.shape[0]):
+        diff = (hours[i] - hour_mean + half) % period - half
+        hour_mean = (hour_mean + alpha * diff) % period
+        hour_var = alpha * (diff * diff) + keep * hour_var
+
+        diff = durations[i] - duration_mean
+        duration_mean = alpha * durations[i] + keep * duration_mean
+        duration_lower_var *= keep
+        duration_upper_var *= keep
+        if diff > 0:
+            duration_upper_var += alpha * (diff * diff)
+        else:
+            duration_lower_var += alpha * (diff * diff)
+
+    return hour_mean, hour_var, duration_mean, duration_lower_var, duration_upper_var
+
+
+if njit is not None:
+    ema_fold = njit(cache=True, nogil=True)(_ema_fold_py)
+    ema_fold_temporal = njit(cache=True, nogil=True)(_ema_fold_temporal_py)
+
+    # Compile once at import so the first batch does not pay the JIT cost
+    ema_fold(np.zeros(1), 0.0, 0.0, 0.2)
+    ema_fold_temporal(np.zeros(1), np.zeros(1), 0.0, 0.0, 0.0, 0.0, 0.0, 0.2, 24.0)
+else:
+    ema_fold = _ema_fold_py
+    ema_fold_temporal = _ema_fold_temporal_py
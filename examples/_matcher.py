@@ -0,0 +1,112 @@
+"""
+Similarity matching kernel for ephemeral identity management.
+
+Finds the stored entity whose behavioral feature vector is closest to a
+query vector under the weighted Euclidean similarity used by
+EphemeralIdentityManager. Rows and query are expected pre-multiplied by
+the per-dimension weights, so the kernels compute a plain Euclidean
+distance. The fastest available implementation is used:
+the Cython extension built from _similarity.pyx, then a Numba-compiled
+loop, then an equivalent vectorized NumPy version.
+
+Author: Agus Setiawan
+License: GPL-3.0
+"""
+
+import numpy as np
+
+try:
+    from . import _similarity
+except ImportError:  # Cython extension not built
+    _similarity = None
+
+if _similarity is None:
+    try:
+        from numba import njit
+    except ImportError:  # Numba is an optional accelerator
+        njit = None
+
+
+# Distance at which similarity reaches 0
+MAX_DISTANCE = 10.0
+
+# Column compared on its own before the full distance (height, the most
+# stable feature). A single weighted dimension is a lower bound on the
+# distance, so rows it already puts out of reach are skipped exactly.
+_PREFILTER_COL = 1
+
+
+def _find_best_loop(matrix, query, threshold, expired):
+    """
+    Find the most similar non-expired row of `matrix`.
+
+    Args:
+        matrix: (N, D) float64 weighted feature rows
+        query: (D,) float64 weighted query vector
+        threshold: Similarity that a match must exceed
+        expired: (N,) bool mask of rows to skip
+
+    Returns:
+        Tuple of (row_index, similarity); row_index is -1 if nothing matches
+    """
+    best_idx = -1
+    best_sim = 0.0
+
+    # Distance a row must stay under to beat both threshold and best match
+    radius = (1.0 - max(threshold, 0.0)) * MAX_DISTANCE
+
+    for i in range(matrix.shape[0]):
+        if expired[i]:
+            continue
+
+        x = matrix[i, _PREFILTER_COL] - query[_PREFILTER_COL]
+        if x * x >= radius * radius:
+            continue
+
+        d = 0.0
+        for k in range(matrix.shape[1]):
+            x = matrix[i, k] - query[k]
+            d += x * x
+
+        sim = 1.0 - np.sqrt(d) / MAX_DISTANCE
+        if sim > best_sim and sim > threshold:
+            best_sim = sim
+            best_idx = i
+            radius = (1.0 - sim) * MAX_DISTANCE
+
+    return best_idx, best_sim
+
+
+def _find_best_numpy(matrix, query, threshold, expired):
+    """Vectorized NumPy fallback with the same semantics as the loop kernel."""
+    radius = (1.0 - max(threshold, 0.0)) * MAX_DISTANCE
+    x = matrix[:, _PREFILTER_COL] - query[_PREFILTER_COL]
+    rows = np.flatnonzero(~expired & (x * x < radius * radius))
+    if rows.shape[0] == 0:
+        return -1, 0.0
+
+    diff = matrix[rows] - query
+    similarities = 1.0 - np.sqrt(np.einsum('ij,ij->i', diff, diff)) / MAX_DISTANCE
+
+    best = int(np.argmax(similarities))
+    best_sim = float(similarities[best])
+    if best_sim > threshold and best_sim > 0.0:
+        return int(rows[best]), best_sim
+
+    return -1, 0.0
+
+
+def _find_best_cython(matrix, query, threshold, expired):
+    """Call the compiled kernel, which takes the expiry mask as uint8."""
+    return _similarity.find_best(matrix, query, threshold, expired.view(np.uint8))
+
+
+if _similarity is not None:
+    find_best = _find_best_cython
+elif njit is not None:
+    find_best = njit(cache=True, fastmath=True)(_find_best_loop)
+
+    # Compile once at import so the first detection does not pay the JIT cost
+    find_best(np.zeros((1, 5)), np.zeros(5), 0.5, np.zeros(1, dtype=np.bool_))
+else:
+    find_best = _find_best_numpy
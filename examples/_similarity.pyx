@@ -0,0 +1,67 @@
+# cython: language_level=3
+"""
+Compiled similarity matching kernel (optional).
+
+Cython build of the loop in _matcher._find_best_loop, for deployments that
+want native speed without Numba's import and JIT start-up cost. Build in
+place with:
+
+    cythonize -i examples/_similarity.pyx
+
+When the extension is not built, _matcher falls back to Numba or NumPy.
+
+Author: Agus Setiawan
+License: GPL-3.0
+"""
+
+cimport cython
+from libc.math cimport sqrt
+
+
+# Distance at which similarity reaches 0 (mirrors _matcher.MAX_DISTANCE)
+cdef double MAX_DISTANCE = 10.0
+
+# Column compared first as a lower bound (mirrors _matcher._PREFILTER_COL)
+cdef Py_ssize_t PREFILTER_COL = 1
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+def find_best(const double[:, ::1] matrix, const double[::1] query,
+              double threshold, const unsigned char[::1] expired):
+    """
+    Find the most similar non-expired row of `matrix`.
+
+    Same contract as _matcher._find_best_loop, except `expired` is a uint8
+    view of the boolean mask.
+    """
+    cdef Py_ssize_t i, k
+    cdef Py_ssize_t n = matrix.shape[0]
+    cdef Py_ssize_t dims = matrix.shape[1]
+    cdef Py_ssize_t best_idx = -1
+    cdef double best_sim = 0.0
+    cdef double d, x, sim
+    cdef double radius = (1.0 - max(threshold, 0.0)) * MAX_DISTANCE
+
+    with nogil:
+        for i in range(n):
+            if expired[i]:
+                continue
+
+            x = matrix[i, PREFILTER_COL] - query[PREFILTER_COL]
+            if x * x >= radius * radius:
+                continue
+
+            d = 0.0
+            for k in range(dims):
+                x = matrix[i, k] - query[k]
+                d += x * x
+
+            sim = 1.0 - sqrt(d) / MAX_DISTANCE
+            if sim > best_sim and sim > threshold:
+                best_sim = sim
+                best_idx = i
+                radius = (1.0 - sim) * MAX_DISTANCE
+
+    return best_idx, best_sim
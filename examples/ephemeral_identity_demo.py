@@ -15,15 +15,62 @@ Author: Agus Setiawan
 License: GPL-3.0
 """
 
+import heapq
+import math
 import secrets
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 import numpy as np
 
+from examples._cli import run_demo_cli
+from examples._matcher import MAX_DISTANCE, find_best
 
-@dataclass
+
+# Categorical encodings used by BehavioralFeatures.to_vector
+_TIME_ENC = {"morning": 0, "afternoon": 1, "evening": 2, "night": 3}
+_ZONE_ENC = {"kitchen": 0, "living_room": 1, "bedroom": 2, "bathroom": 3}
+_PATTERN_ENC = {"steady": 0, "variable": 1, "stationary": 2}
+
+# Similarity weights per vector dimension (speed and height count double)
+_WEIGHTS = np.array([2.0, 2.0, 1.0, 1.0, 1.0])
+
+_SECONDS_PER_DAY = 86400.0
+
+# Internal clock for recency bookkeeping; datetimes are only used at the
+# API/display boundary
+_now = time.monotonic
+
+
+class _IdPool:
+    """
+    Pool of cryptographically random ID tokens.
+    
+    Draws random bytes from the OS in blocks and hands them out 16 bytes at
+    a time, so bursts of new entities don't each cost a syscall.
+    """
+    
+    TOKEN_BYTES = 16
+    
+    def __init__(self, size: int = 256) -> None:
+        self._size = size
+        self._refill()
+    
+    def _refill(self) -> None:
+        self._buf = secrets.token_bytes(self.TOKEN_BYTES * self._size)
+        self._pos = 0
+    
+    def next(self) -> str:
+        """Return the next unused token as hex"""
+        if self._pos == len(self._buf):
+            self._refill()
+        start = self._pos
+        self._pos = start + self.TOKEN_BYTES
+        return self._buf[start:self._pos].hex()
+
+
+@dataclass(slots=True)
 class BehavioralFeatures:
     """
     Abstract behavioral features extracted from sensors.
@@ -35,60 +82,155 @@ class BehavioralFeatures:
     interaction_zone: str  # location zone (kitchen/living_room/bedroom)
     movement_pattern: str  # pattern type (steady/variable/stationary)
     
+    # Cached result of to_vector (built once per instance)
+    _vec: Optional[np.ndarray] = field(default=None, repr=False, compare=False)
+    
     def to_vector(self) -> np.ndarray:
-        """Convert features to numerical vector for similarity comparison."""
-        # Encode categorical features
-        time_encoding = {"morning": 0, "afternoon": 1, "evening": 2, "night": 3}
-        zone_encoding = {"kitchen": 0, "living_room": 1, "bedroom": 2, "bathroom": 3}
-        pattern_encoding = {"steady": 0, "variable": 1, "stationary": 2}
+        """
+        Convert features to numerical vector for similarity comparison.
         
-        return np.array([
-            self.movement_speed,
-            self.height_estimate,
-            time_encoding.get(self.activity_time, 0),
-            zone_encoding.get(self.interaction_zone, 0),
-            pattern_encoding.get(self.movement_pattern, 0)
-        ])
+        The vector is cached and shared between calls, so it is returned
+        read-only; copy it before modifying.
+        """
+        vec = self._vec
+        if vec is None:
+            vec = self._vec = np.array((
+                self.movement_speed,
+                self.height_estimate,
+                _TIME_ENC.get(self.activity_time, 0),
+                _ZONE_ENC.get(self.interaction_zone, 0),
+                _PATTERN_ENC.get(self.movement_pattern, 0)
+            ), dtype=np.float64)
+            vec.flags.writeable = False
+        
+        return vec
 
 
-@dataclass
+@dataclass(init=False, slots=True)
 class EntityProfile:
     """
     Ephemeral entity profile with behavioral patterns.
     No personal identifiable information stored.
+    
+    The last sighting is kept on the monotonic clock; last_seen derives
+    the wall-clock time from it on read.
     """
     entity_id: str
     first_observed: datetime
-    last_seen: datetime
-    observation_count: int = 0
-    typical_features: Optional[BehavioralFeatures] = None
-    confidence: float = 0.0
+    observation_count: int
+    confidence: float
+    
+    # Running average of observed feature vectors (see BehavioralFeatures.to_vector)
+    typical_vec: Optional[np.ndarray] = field(repr=False, compare=False)
+    
+    # Last sighting on the monotonic clock (kept current by update)
+    last_seen_ts: float = field(repr=False)
+    
+    # Called when the features or last sighting change, so an owning
+    # manager can re-index the profile and reschedule its expiry
+    on_change: Optional[Callable[['EntityProfile'], None]] = field(repr=False, compare=False)
+    
+    def __init__(self, entity_id: str, first_observed: datetime, last_seen: datetime,
+                 observation_count: int = 0,
+                 typical_features: Optional[BehavioralFeatures] = None,
+                 confidence: float = 0.0) -> None:
+        self.entity_id = entity_id
+        self.first_observed = first_observed
+        self.observation_count = observation_count
+        self.confidence = confidence
+        self.typical_vec = None if typical_features is None else typical_features.to_vector().copy()
+        self.on_change = None
+        self.last_seen = last_seen
+    
+    @property
+    def last_seen(self) -> datetime:
+        """Wall-clock time of the last sighting"""
+        return datetime.now() - timedelta(seconds=_now() - self.last_seen_ts)
+    
+    @last_seen.setter
+    def last_seen(self, value: datetime) -> None:
+        self.last_seen_ts = _now() - (datetime.now() - value).total_seconds()
+        if self.on_change is not None:
+            self.on_change(self)
     
     def is_expired(self, expiry_days: int = 30) -> bool:
         """Check if entity ID has expired due to inactivity."""
-        inactivity = datetime.now() - self.last_seen
-        return inactivity.days > expiry_days
+        return (_now() - self.last_seen_ts) > expiry_days * _SECONDS_PER_DAY
     
-    def update(self, features: BehavioralFeatures):
-        """Update profile with new observation."""
-        self.last_seen = datetime.now()
+    def update(self, features: BehavioralFeatures, ts: Optional[float] = None) -> None:
+        """
+        Update profile with new observation.
+        
+        Args:
+            features: Observed behavioral features
+            ts: Observation time on the monotonic clock; read now if omitted
+        """
+        self.last_seen_ts = _now() if ts is None else ts
         self.observation_count += 1
         
         # Update confidence based on observation count
-        self.confidence = min(1.0, self.observation_count / 10.0)
+        confidence = self.observation_count / 10.0
+        self.confidence = confidence if confidence < 1.0 else 1.0
         
-        if self.typical_features is None:
-            self.typical_features = features
+        new_vec = features.to_vector()
+        if self.typical_vec is None:
+            self.typical_vec = new_vec.copy()
         else:
-            # Exponential moving average to update typical features
+            # Exponential moving average to update typical features, in place
             alpha = 0.3  # Learning rate
-            current_vec = self.typical_features.to_vector()
-            new_vec = features.to_vector()
-            updated_vec = alpha * new_vec + (1 - alpha) * current_vec
-            
-            # Update typical features (simplified - just update numerical values)
-            self.typical_features.movement_speed = updated_vec[0]
-            self.typical_features.height_estimate = updated_vec[1]
+            self.typical_vec *= 1 - alpha
+            self.typical_vec += alpha * new_vec
+        
+        if self.on_change is not None:
+            self.on_change(self)
+
+
+class _EntityTable(dict):
+    """
+    Entity profiles by ID.
+    
+    A plain dict that counts its mutations, so the manager can tell when
+    profiles were added, removed or replaced behind its back and its
+    matching index needs rebuilding.
+    """
+    
+    __slots__ = ('version',)
+    
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.version = 0
+    
+    def __setitem__(self, key: str, value: EntityProfile) -> None:
+        super().__setitem__(key, value)
+        self.version += 1
+    
+    def __delitem__(self, key: str) -> None:
+        super().__delitem__(key)
+        self.version += 1
+    
+    def __ior__(self, other):
+        self.version += 1
+        return super().__ior__(other)
+    
+    def pop(self, *args):
+        self.version += 1
+        return super().pop(*args)
+    
+    def popitem(self):
+        self.version += 1
+        return super().popitem()
+    
+    def setdefault(self, *args):
+        self.version += 1
+        return super().setdefault(*args)
+    
+    def update(self, *args, **kwargs) -> None:
+        self.version += 1
+        super().update(*args, **kwargs)
+    
+    def clear(self) -> None:
+        self.version += 1
+        super().clear()
 
 
 class EphemeralIdentityManager:
@@ -102,14 +244,57 @@ class EphemeralIdentityManager:
     - Re-identification based on behavioral similarity only
     """
     
-    def __init__(self, similarity_threshold: float = 0.85, expiry_days: int = 30):
-        self.entities: Dict[str, EntityProfile] = {}
+    def __init__(self, similarity_threshold: float = 0.85, expiry_days: int = 30) -> None:
+        self.entities = {}
         self.similarity_threshold = similarity_threshold
+        
+        # Contiguous matching index: one feature row per entity, kept in sync
+        # with self.entities so matching is a single vectorized operation.
+        # Rows are stored pre-multiplied by _WEIGHTS, so the scan computes a
+        # plain Euclidean distance.
+        self._entity_matrix = np.empty((0, 5))
+        self._skip = np.empty(0, dtype=bool)  # Rows matching must ignore
+        self._entity_ids: List[str] = []
+        self._entity_rows: Dict[str, int] = {}
+        self._synced_version = self.entities.version
+        
+        # Min-heap of (expiry deadline, entity_id). Updating an entity pushes
+        # a new entry; superseded entries are recognised and dropped on pop.
+        # Entities whose deadline has passed are flagged in _skip and queued
+        # in _expired_ids until cleanup removes them.
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._expired_ids: List[str] = []
+        
+        self._id_pool = _IdPool()
+        
         self.expiry_days = expiry_days
     
+    @property
+    def entities(self) -> Dict[str, EntityProfile]:
+        """Tracked entity profiles by ID"""
+        return self._entities
+    
+    @entities.setter
+    def entities(self, value: Dict[str, EntityProfile]) -> None:
+        self._entities = _EntityTable(value)
+        self._synced_version = -1  # Index no longer reflects the profiles
+    
+    @property
+    def expiry_days(self) -> int:
+        """Days of inactivity after which an entity expires"""
+        return self._expiry_days
+    
+    @expiry_days.setter
+    def expiry_days(self, value: int) -> None:
+        self._expiry_days = value
+        self._expiry_seconds = value * _SECONDS_PER_DAY
+        if self.entities:
+            # Deadlines in the expiry heap were computed for the old period
+            self._rebuild_index()
+    
     def generate_entity_id(self) -> str:
         """Generate cryptographically random entity ID."""
-        return f"entity_{secrets.token_hex(16)}"
+        return f"entity_{self._id_pool.next()}"
     
     def calculate_similarity(self, features1: BehavioralFeatures, 
                            features2: BehavioralFeatures) -> float:
@@ -117,94 +302,193 @@ class EphemeralIdentityManager:
         Calculate behavioral similarity between two feature sets.
         Returns value between 0 (completely different) and 1 (identical).
         """
-        vec1 = features1.to_vector()
-        vec2 = features2.to_vector()
-        
-        # Use weighted Euclidean distance for better discrimination
-        # Weight movement speed and height more heavily
-        weights = np.array([2.0, 2.0, 1.0, 1.0, 1.0])
-        
-        # Calculate weighted distance
-        diff = (vec1 - vec2) * weights
-        distance = np.linalg.norm(diff)
+        # Weighted Euclidean distance; speed and height weigh more heavily
+        diff = (features1.to_vector() - features2.to_vector()) * _WEIGHTS
+        distance = math.sqrt(diff @ diff)
         
         # Convert distance to similarity (0 = different, 1 = identical)
         # Max expected distance is ~10 for very different entities
-        max_distance = 10.0
-        similarity = max(0.0, 1.0 - (distance / max_distance))
+        similarity = 1.0 - distance / MAX_DISTANCE
+        return similarity if similarity > 0.0 else 0.0
+    
+    def _write_row(self, profile: EntityProfile) -> None:
+        """Copy an entity's typical features into the index and schedule its expiry."""
+        row = self._entity_rows.get(profile.entity_id)
+        if row is None:
+            row = len(self._entity_ids)
+            if row == len(self._entity_matrix):
+                # Grow by doubling so inserts stay amortized O(1)
+                capacity = max(8, 2 * row)
+                matrix = np.empty((capacity, 5))
+                matrix[:row] = self._entity_matrix[:row]
+                skip = np.empty(capacity, dtype=bool)
+                skip[:row] = self._skip[:row]
+                self._entity_matrix, self._skip = matrix, skip
+            self._entity_ids.append(profile.entity_id)
+            self._entity_rows[profile.entity_id] = row
+        profile.on_change = self._reindex
         
-        return similarity
-    
-    def find_matching_entity(self, features: BehavioralFeatures) -> Optional[str]:
+        heap = self._expiry_heap
+        if len(heap) > 2 * len(self.entities) + 64:
+            # Mostly superseded entries; rebuild from current deadlines
+            heap = self._expiry_heap = [(self._deadline(p), eid)
+                                        for eid, p in self.entities.items()]
+            heapq.heapify(heap)
+        heapq.heappush(heap, (self._deadline(profile), profile.entity_id))
+        
+        if profile.typical_vec is None:
+            # Nothing to match against
+            self._entity_matrix[row] = 0.0
+            self._skip[row] = True
+        else:
+            np.multiply(profile.typical_vec, _WEIGHTS, out=self._entity_matrix[row])
+            self._skip[row] = False
+    
+    def _remove_row(self, entity_id: str) -> None:
+        """Drop an entity from the index, filling its row with the last one."""
+        row = self._entity_rows.pop(entity_id)
+        last = len(self._entity_ids) - 1
+        if row != last:
+            moved = self._entity_ids[last]
+            self._entity_matrix[row] = self._entity_matrix[last]
+            self._skip[row] = self._skip[last]
+            self._entity_ids[row] = moved
+            self._entity_rows[moved] = row
+        self._entity_ids.pop()
+    
+    def _rebuild_index(self) -> None:
+        """Rebuild the matching index and expiry heap from self.entities."""
+        self._entity_ids = []
+        self._entity_rows = {}
+        self._expiry_heap = []
+        self._expired_ids = []
+        for profile in self.entities.values():
+            self._write_row(profile)
+        self._synced_version = self.entities.version
+    
+    def _reindex(self, profile: EntityProfile) -> None:
+        """Rewrite a stored profile's row and deadline after it changed."""
+        if (self._synced_version == self.entities.version
+                and self.entities.get(profile.entity_id) is profile):
+            self._write_row(profile)
+    
+    def _sync_index(self) -> None:
+        """Rebuild the index if entities were changed outside the manager."""
+        if self._synced_version != self.entities.version:
+            self._rebuild_index()
+    
+    def _deadline(self, profile: EntityProfile) -> float:
+        """Monotonic time after which a profile counts as expired."""
+        return profile.last_seen_ts + self._expiry_seconds
+    
+    def _is_current(self, deadline: float, entity_id: str) -> bool:
+        """Whether a heap entry still reflects its entity's last sighting."""
+        profile = self.entities.get(entity_id)
+        return profile is not None and self._deadline(profile) == deadline
+    
+    def _expire_due(self, now: float) -> None:
+        """Flag entities whose expiry deadline has passed."""
+        heap = self._expiry_heap
+        while heap and heap[0][0] < now:
+            deadline, eid = heapq.heappop(heap)
+            if self._is_current(deadline, eid):
+                self._skip[self._entity_rows[eid]] = True
+                self._expired_ids.append(eid)
+    
+    def find_matching_entity(self, features: BehavioralFeatures,
+                             ts: Optional[float] = None) -> Optional[str]:
         """
         Find existing entity that matches behavioral features.
         Returns entity_id if match found, None otherwise.
+        
+        `ts` is the current monotonic time, read from the clock if omitted.
         """
-        best_match_id = None
-        best_similarity = 0.0
+        self._sync_index()
+        
+        n = len(self._entity_ids)
+        if n == 0:
+            return None
         
-        # Check all active entities
-        for entity_id, profile in self.entities.items():
-            if profile.is_expired(self.expiry_days):
-                continue
-                
-            if profile.typical_features is None:
-                continue
-            
-            similarity = self.calculate_similarity(features, profile.typical_features)
-            
-            if similarity > best_similarity and similarity > self.similarity_threshold:
-                best_similarity = similarity
-                best_match_id = entity_id
+        # Skip expired entities
+        self._expire_due(_now() if ts is None else ts)
         
-        return best_match_id
+        best, _ = find_best(self._entity_matrix[:n], features.to_vector() * _WEIGHTS,
+                            self.similarity_threshold, self._skip[:n])
+        
+        return self._entity_ids[best] if best >= 0 else None
     
-    def detect_entity(self, features: BehavioralFeatures) -> Tuple[str, bool]:
+    def detect_entity(self, features: BehavioralFeatures,
+                      ts: Optional[float] = None) -> Tuple[str, bool]:
         """
         Detect entity from behavioral features.
         
+        Args:
+            features: Observed behavioral features
+            ts: Observation time on the monotonic clock; read now if omitted
+        
         Returns:
             Tuple of (entity_id, is_new_entity)
         """
+        if ts is None:
+            ts = _now()
+        
         # Try to match with existing entity
-        entity_id = self.find_matching_entity(features)
+        entity_id = self.find_matching_entity(features, ts)
         
         if entity_id:
             # Existing entity re-identified
-            self.entities[entity_id].update(features)
+            profile = self.entities[entity_id]
+            profile.update(features, ts)  # Re-indexed through on_change
             return entity_id, False
         else:
             # New entity detected
             entity_id = self.generate_entity_id()
+            now = datetime.now()
             profile = EntityProfile(
                 entity_id=entity_id,
-                first_observed=datetime.now(),
-                last_seen=datetime.now(),
+                first_observed=now,
+                last_seen=now,
                 observation_count=1,
                 typical_features=features,
                 confidence=0.1
             )
+            profile.last_seen_ts = ts
             self.entities[entity_id] = profile
+            self._synced_version = self.entities.version
+            self._write_row(profile)
             return entity_id, True
     
-    def cleanup_expired_entities(self):
+    def cleanup_expired_entities(self) -> int:
         """Remove expired entity IDs."""
-        expired = [eid for eid, profile in self.entities.items() 
-                  if profile.is_expired(self.expiry_days)]
+        self._sync_index()
+        
+        now = _now()
+        self._expire_due(now)
         
-        for eid in expired:
-            del self.entities[eid]
+        removed = 0
+        for eid in self._expired_ids:
+            profile = self.entities.get(eid)
+            if profile is not None and self._deadline(profile) < now:
+                del self.entities[eid]
+                self._remove_row(eid)
+                profile.on_change = None
+                removed += 1
+        self._expired_ids = []
+        self._synced_version = self.entities.version
         
-        return len(expired)
+        return removed
     
     def get_entity_info(self, entity_id: str) -> Optional[EntityProfile]:
         """Get entity profile (for demonstration purposes)."""
         return self.entities.get(entity_id)
 
 
-def run_demo():
+def run_demo(pause: Callable[[float], None] = time.sleep) -> None:
     """
     Demonstrate ephemeral identity management with simulated scenarios.
+    
+    Args:
+        pause: Called with a delay in seconds between scenarios
     """
     print("=" * 70)
     print("EPHEMERAL IDENTITY MANAGEMENT DEMO")
@@ -233,7 +517,7 @@ def run_demo():
     print(f"✓ No biometric data stored - only behavioral patterns")
     print()
     
-    time.sleep(1)
+    pause(1)
     
     print("Scenario 2: Same person returns to kitchen (afternoon)")
     print("-" * 70)
@@ -257,7 +541,7 @@ def run_demo():
     print(f"✓ Observation count: {profile.observation_count}")
     print()
     
-    time.sleep(1)
+    pause(1)
     
     print("Scenario 3: Different person enters (Person B)")
     print("-" * 70)
@@ -277,7 +561,7 @@ def run_demo():
     print(f"✓ Different ID from Person A: {entity_id != entity_id_b}")
     print()
     
-    time.sleep(1)
+    pause(1)
     
     print("Scenario 4: Entity re-identification over time")
     print("-" * 70)
@@ -298,7 +582,7 @@ def run_demo():
     print(f"✓ Confidence after multiple observations: {profile_a.confidence:.2f}")
     print()
     
-    time.sleep(1)
+    pause(1)
     
     print("Scenario 5: Privacy properties verification")
     print("-" * 70)
@@ -331,4 +615,4 @@ def run_demo():
 
 
 if __name__ == "__main__":
-    run_demo()
+    run_demo_cli(run_demo, "Ephemeral identity management demo")
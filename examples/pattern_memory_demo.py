@@ -16,59 +16,390 @@ Author: Agus Setiawan
 License: GPL-3.0
 """
 
+import io
+import math
+import sys
 import time
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
 from dataclasses import dataclass, field
 import numpy as np
-from collections import defaultdict
 
+from examples._cli import run_demo_cli
+from examples._ema import ema_fold, ema_fold_temporal
 
-@dataclass
+# Learning rate of the exponential moving averages, and its complement
+_ALPHA = 0.2
+_KEEP = 1.0 - _ALPHA
+
+# Hours of the day form a circle: differences wrap at +/- half a day
+_DAY_HOURS = 24.0
+_HALF_DAY_HOURS = 12.0
+
+# Spread floors for anomaly z-scores, so a perfectly regular pattern still
+# flags a different hour or duration instead of dividing by zero
+_MIN_HOUR_STD = 0.25       # 15 minutes
+_MIN_DURATION_STD = 1.0    # minutes
+
+# Zone count scale below which it is folded back into the counts
+_MIN_ZONE_SCALE = 1e-150
+
+# Pattern stability reaches 1.0 after this many (decayed) observations
+_INV_STABLE_COUNT = 1.0 / 20.0
+
+
+class _DecayClock:
+    """
+    Observation clock shared by a PatternMemory and its patterns.
+    
+    Every observation advances the epoch by one. Patterns remember the epoch
+    their decaying values were last brought up to date and apply the decay
+    accumulated since then when read or updated, so patterns that are not
+    touched cost nothing per observation.
+    """
+    
+    # Number of precomputed powers of the decay factor
+    TABLE_SIZE = 4096
+    
+    def __init__(self, decay_factor: float):
+        self.decay_factor = decay_factor
+        self.epoch = 0
+    
+    @property
+    def decay_factor(self) -> float:
+        """Factor applied once per observation"""
+        return self._decay_factor
+    
+    @decay_factor.setter
+    def decay_factor(self, value: float):
+        self._decay_factor = value
+        table = np.power(value, np.arange(self.TABLE_SIZE, dtype=np.float64))
+        table.flags.writeable = False
+        self._power_table = table
+        self._powers = table.tolist()  # List copy for fast scalar indexing
+        self._log_decay = math.log(value) if value > 0 else -math.inf
+    
+    def power(self, steps: int) -> float:
+        """Decay factor raised to `steps`"""
+        if steps < self.TABLE_SIZE:
+            return self._powers[steps]
+        return math.exp(steps * self._log_decay)
+    
+    def powers(self, n: int) -> np.ndarray:
+        """Read-only array of the decay factor raised to n-1, n-2, ..., 0 (n >= 1)"""
+        if n <= self.TABLE_SIZE:
+            return self._power_table[n - 1::-1]
+        return self.decay_factor ** np.arange(n - 1, -1, -1, dtype=np.float64)
+    
+    def factor(self, since: int) -> float:
+        """Decay accumulated between epoch `since` and now"""
+        return self.power(self.epoch - since)
+
+
+class _ZoneIndex:
+    """
+    Interning table that maps zone names to small integer ids, so spatial
+    patterns can keep their zone counts in a dense array.
+    """
+    
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+    
+    def intern(self, zone: str) -> int:
+        """Return the id for `zone`, assigning the next one if it is new"""
+        zid = self.ids.get(zone)
+        if zid is None:
+            # Intern new names once, so later lookups with interned strings
+            # (literals, or names read back from the index) match by identity
+            zone = sys.intern(str(zone))
+            zid = self.ids[zone] = len(self.names)
+            self.names.append(zone)
+        return zid
+
+
+def _observation_arrays(hours: Sequence[float], durations: Sequence[float],
+                       zones: Union[str, Sequence[str]],
+                       speeds: Union[float, Sequence[float]]
+                       ) -> Tuple[np.ndarray, np.ndarray, List[str], np.ndarray]:
+    """
+    Check a batch of observations and return it as 1-D float arrays (zones
+    as a list), with a single zone or speed repeated for every occurrence.
+    
+    Raises:
+        ValueError: if the inputs do not all have one entry per occurrence
+    """
+    hours = np.asarray(hours, dtype=np.float64).reshape(-1)
+    durations = np.asarray(durations, dtype=np.float64).reshape(-1)
+    n = len(hours)
+    zones = [zones] * n if isinstance(zones, str) else list(zones)
+    speeds = np.asarray(speeds, dtype=np.float64)
+    speeds = np.full(n, float(speeds)) if speeds.ndim == 0 else speeds.reshape(-1)
+    if not len(durations) == len(zones) == len(speeds) == n:
+        raise ValueError(
+            f"got {n} hours, {len(durations)} durations, {len(zones)} zones "
+            f"and {len(speeds)} speeds; expected one of each per occurrence")
+    return hours, durations, zones, speeds
+
+
+@dataclass(init=False, slots=True)
 class TemporalPattern:
     """
     Temporal activity patterns - stores WHEN activities typically occur,
     but NOT specific timestamps of individual events.
+    
+    Spreads are stored as variances; the *_std attributes derive the
+    standard deviation on read. Observation count and stability decay
+    lazily against the owning memory's clock.
     """
-    # Statistical summary of active hours (mean and std)
-    active_hours_mean: float = 12.0  # Mean hour of day
-    active_hours_std: float = 4.0    # Standard deviation
+    # Statistical summary of active hours (circular mean and variance)
+    active_hours_mean: float  # Mean hour of day
+    active_hours_var: float
     
-    # Typical activity duration (in minutes)
-    typical_duration_mean: float = 0.0
-    typical_duration_std: float = 0.0
+    # Typical activity duration (in minutes), with its variance split into
+    # the parts contributed by durations below and above the mean
+    typical_duration_mean: float
+    typical_duration_lower_var: float
+    typical_duration_upper_var: float
     
     # Activity frequency (per day)
-    frequency_per_day: float = 0.0
+    frequency_per_day: float
+    
+    # Last update time, in time.monotonic() seconds (for diagnostics)
+    last_updated: float = field(compare=False)
+    
+    # Pattern stability and number of observations, as of last_epoch
+    _pattern_stability: float
+    _observation_count: float
+    
+    # Decay bookkeeping (no clock: values do not decay)
+    last_epoch: int
+    clock: Optional[_DecayClock] = field(repr=False, compare=False)
+    
+    def __init__(self, active_hours_mean: float = 12.0, active_hours_std: float = 4.0,
+                 typical_duration_mean: float = 0.0, typical_duration_std: float = 0.0,
+                 frequency_per_day: float = 0.0, pattern_stability: float = 0.0,
+                 last_updated: Optional[float] = None, observation_count: int = 0,
+                 clock: Optional[_DecayClock] = None):
+        self.active_hours_mean = active_hours_mean
+        self.active_hours_var = active_hours_std * active_hours_std
+        self.typical_duration_mean = typical_duration_mean
+        self.typical_duration_var = typical_duration_std * typical_duration_std
+        self.frequency_per_day = frequency_per_day
+        self.last_updated = time.monotonic() if last_updated is None else last_updated
+        self._pattern_stability = pattern_stability
+        self._observation_count = observation_count
+        self.clock = clock
+        self.last_epoch = 0 if clock is None else clock.epoch
+    
+    def _pending_decay(self) -> float:
+        """Decay not yet applied to the stored count and stability"""
+        return 1.0 if self.clock is None else self.clock.factor(self.last_epoch)
+    
+    def _settle(self):
+        """Apply pending decay to the stored values"""
+        if self.clock is not None:
+            factor = self.clock.factor(self.last_epoch)
+            self._observation_count *= factor
+            self._pattern_stability *= factor
+            self.last_epoch = self.clock.epoch
+    
+    def _duration_spread(self) -> Tuple[float, float, float]:
+        """
+        Centre of the duration and its spread below and above, in std units.
+        
+        The centre is the mean; each spread is the root of twice the
+        semivariance on its side, which equals the std when durations are
+        symmetric, so a skewed duration gets a wider spread on its long
+        side. Both are moving averages, so old durations fade like the
+        rest of the pattern.
+        """
+        return (self.typical_duration_mean, math.sqrt(2.0 * self.typical_duration_lower_var),
+                math.sqrt(2.0 * self.typical_duration_upper_var))
+    
+    @property
+    def observation_count(self) -> float:
+        """Decayed number of observations (for confidence)"""
+        return self._observation_count * self._pending_decay()
     
-    # Pattern stability (how consistent the pattern is)
-    pattern_stability: float = 0.0
+    @observation_count.setter
+    def observation_count(self, value: float):
+        self._settle()
+        self._observation_count = value
     
-    # Last update time (for decay calculation)
-    last_updated: datetime = field(default_factory=datetime.now)
+    @property
+    def pattern_stability(self) -> float:
+        """How consistent the pattern is (decays with the count)"""
+        return self._pattern_stability * self._pending_decay()
     
-    # Number of observations (for confidence)
-    observation_count: int = 0
+    @pattern_stability.setter
+    def pattern_stability(self, value: float):
+        self._settle()
+        self._pattern_stability = value
+    
+    @property
+    def active_hours_std(self) -> float:
+        """Standard deviation of active hours"""
+        return math.sqrt(self.active_hours_var)
+    
+    @active_hours_std.setter
+    def active_hours_std(self, value: float):
+        self.active_hours_var = value * value
+    
+    @property
+    def typical_duration_var(self) -> float:
+        """Variance of activity duration (minutes squared)"""
+        return self.typical_duration_lower_var + self.typical_duration_upper_var
+    
+    @typical_duration_var.setter
+    def typical_duration_var(self, value: float):
+        # No skew information: split evenly between the two sides
+        self.typical_duration_lower_var = self.typical_duration_upper_var = 0.5 * value
+    
+    @property
+    def typical_duration_std(self) -> float:
+        """Standard deviation of activity duration (minutes)"""
+        return math.sqrt(self.typical_duration_var)
+    
+    @typical_duration_std.setter
+    def typical_duration_std(self, value: float):
+        self.typical_duration_var = value * value
 
 
-@dataclass
+@dataclass(init=False, slots=True)
 class SpatialPattern:
     """
     Spatial movement patterns - stores WHERE activities occur,
     but NOT detailed location histories.
+    
+    Zone visit counts decay lazily against the owning memory's clock.
+    Counts and their total decay by the same factor, so zone frequencies
+    can be read without bringing them up to date. Decay is applied to a
+    shared scale factor rather than to every zone's count, so it costs
+    O(1) however many zones have been visited.
     """
-    # Common zones with frequency (abstract locations)
-    zone_frequencies: Dict[str, float] = field(default_factory=dict)
+    # Visit counts indexed by zone id (abstract locations), in units of
+    # _zone_scale, and their sum, as of last_epoch; zone_frequencies
+    # derives probabilities on read
+    _zone_counts: np.ndarray = field(compare=False)
+    _zone_scale: float = field(compare=False)
+    _zone_total: float = field(compare=False)
+    zones: _ZoneIndex = field(repr=False, compare=False)
     
-    # Movement speed statistics
-    movement_speed_mean: float = 0.0
-    movement_speed_std: float = 0.0
+    # Movement speed statistics (mean and variance)
+    movement_speed_mean: float
+    movement_speed_var: float
     
     # Transition patterns between zones (probabilities)
-    zone_transitions: Dict[Tuple[str, str], float] = field(default_factory=dict)
+    zone_transitions: Dict[Tuple[str, str], float]
+    
+    # Decay bookkeeping (no clock: values do not decay)
+    last_epoch: int = field(compare=False)
+    clock: Optional[_DecayClock] = field(repr=False, compare=False)
+    
+    def __init__(self, zone_frequencies: Optional[Dict[str, float]] = None,
+                 movement_speed_mean: float = 0.0, movement_speed_std: float = 0.0,
+                 zone_transitions: Optional[Dict[Tuple[str, str], float]] = None,
+                 clock: Optional[_DecayClock] = None, zones: Optional[_ZoneIndex] = None):
+        self.zones = _ZoneIndex() if zones is None else zones
+        self._zone_counts = np.zeros(0)
+        self._zone_scale = 1.0
+        self._zone_total = 0.0
+        for zone, count in (zone_frequencies or {}).items():
+            self._add_visits(self.zones.intern(zone), count)
+        self.movement_speed_mean = movement_speed_mean
+        self.movement_speed_var = movement_speed_std * movement_speed_std
+        self.zone_transitions = {} if zone_transitions is None else zone_transitions
+        self.clock = clock
+        self.last_epoch = 0 if clock is None else clock.epoch
+    
+    def __eq__(self, other: object) -> bool:
+        # Compare decayed counts by zone name: the count array itself is
+        # laid out by zone id, scaled, and cannot be compared with ==
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.zone_counts == other.zone_counts
+                and self.movement_speed_mean == other.movement_speed_mean
+                and self.movement_speed_var == other.movement_speed_var
+                and self.zone_transitions == other.zone_transitions)
+    
+    def _pending_decay(self) -> float:
+        """Decay not yet applied to the stored zone counts"""
+        return 1.0 if self.clock is None else self.clock.factor(self.last_epoch)
+    
+    def _settle(self):
+        """Apply pending decay to the stored zone counts"""
+        if self.clock is not None:
+            factor = self.clock.factor(self.last_epoch)
+            if factor != 1.0:
+                self._decay(factor)
+            self.last_epoch = self.clock.epoch
+    
+    def _decay(self, factor: float):
+        """Scale every zone count and the total by `factor`"""
+        self._zone_total *= factor
+        self._zone_scale *= factor
+        if self._zone_scale < _MIN_ZONE_SCALE:
+            # Fold the scale into the counts before it underflows
+            self._zone_counts *= self._zone_scale
+            self._zone_scale = 1.0
+    
+    def _reserve(self, zid: int):
+        """Grow the count array (in chunks of 8) to hold zone id `zid`"""
+        size = len(self._zone_counts)
+        if zid >= size:
+            counts = np.zeros((zid // 8 + 1) * 8)
+            counts[:size] = self._zone_counts
+            self._zone_counts = counts
+    
+    def _add_visits(self, zid: int, count: float):
+        """Add `count` visits to zone id `zid`"""
+        self._reserve(zid)
+        self._zone_counts[zid] += count / self._zone_scale
+        self._zone_total += count
+    
+    def _zone_items(self, scale: float) -> Dict[str, float]:
+        """Map each visited zone's name to its count (as of last_epoch) times `scale`"""
+        names = self.zones.names
+        counts = self._zone_counts
+        scale *= self._zone_scale
+        return {names[zid]: counts[zid] * scale for zid in np.flatnonzero(counts)}
+    
+    @property
+    def zone_counts(self) -> Dict[str, float]:
+        """Decayed visit count per zone"""
+        return self._zone_items(self._pending_decay())
+    
+    @property
+    def zone_total(self) -> float:
+        """Sum of the decayed zone visit counts"""
+        return self._zone_total * self._pending_decay()
+    
+    @property
+    def zone_frequencies(self) -> Dict[str, float]:
+        """Probability of the activity occurring in each zone"""
+        return self._zone_items(1.0 / self._zone_total) if self._zone_total else {}
+    
+    def top_zones(self, k: int = 10) -> List[Tuple[str, float]]:
+        """The `k` most frequent zones with their frequencies, most frequent first"""
+        if not self._zone_total:
+            return []
+        counts = self._zone_counts
+        names = self.zones.names
+        scale = self._zone_scale / self._zone_total
+        order = np.argsort(-counts, kind='stable')[:k]
+        return [(names[zid], counts[zid] * scale) for zid in order if counts[zid] > 0]
+    
+    @property
+    def movement_speed_std(self) -> float:
+        """Standard deviation of movement speed"""
+        return math.sqrt(self.movement_speed_var)
+    
+    @movement_speed_std.setter
+    def movement_speed_std(self, value: float):
+        self.movement_speed_var = value * value
 
 
-@dataclass
+@dataclass(slots=True)
 class ActivityPattern:
     """
     Activity-specific patterns - stores HOW activities are performed,
@@ -107,9 +438,32 @@ class PatternMemory:
             decay_factor: Factor for exponential decay (0.95 = 5% decay per update)
         """
         self.patterns: Dict[str, ActivityPattern] = {}
-        self.decay_factor = decay_factor
+        self._clock = _DecayClock(decay_factor)
+        self._zones = _ZoneIndex()  # Zone ids shared by all spatial patterns
         self.total_observations = 0
     
+    @property
+    def decay_factor(self) -> float:
+        """Factor for exponential decay per observation"""
+        return self._clock.decay_factor
+    
+    @decay_factor.setter
+    def decay_factor(self, value: float):
+        self._clock.decay_factor = value
+    
+    def _get_or_create_pattern(self, activity_type: str) -> ActivityPattern:
+        """Get the pattern for an activity, creating it on first sight."""
+        pattern = self.patterns.get(activity_type)
+        if pattern is None:
+            activity_type = sys.intern(str(activity_type))
+            pattern = ActivityPattern(
+                activity_type=activity_type,
+                temporal=TemporalPattern(clock=self._clock),
+                spatial=SpatialPattern(clock=self._clock, zones=self._zones)
+            )
+            self.patterns[activity_type] = pattern
+        return pattern
+    
     def observe_activity(self, activity_type: str, hour: float, 
                         duration_minutes: float, zone: str, 
                         movement_speed: float = 1.0):
@@ -127,10 +481,9 @@ class PatternMemory:
             movement_speed: Movement speed during activity
         """
         # Get or create pattern
-        if activity_type not in self.patterns:
-            self.patterns[activity_type] = ActivityPattern(activity_type=activity_type)
-        
-        pattern = self.patterns[activity_type]
+        pattern = self.patterns.get(activity_type)
+        if pattern is None:
+            pattern = self._get_or_create_pattern(activity_type)
         
         # Update temporal pattern
         self._update_temporal_pattern(pattern.temporal, hour, duration_minutes)
@@ -138,106 +491,259 @@ class PatternMemory:
         # Update spatial pattern
         self._update_spatial_pattern(pattern.spatial, zone, movement_speed)
         
-        # Apply decay to all other patterns (forgetting mechanism)
+        # Apply decay to all patterns (forgetting mechanism)
         self._apply_decay()
         
         self.total_observations += 1
     
+    def observe_activities_batch(self, activity_type: str, hours: Sequence[float],
+                                 durations: Sequence[float],
+                                 zones: Union[str, Sequence[str]],
+                                 speeds: Union[float, Sequence[float]] = 1.0):
+        """
+        Observe several occurrences of one activity at once.
+        
+        Equivalent to calling observe_activity for each occurrence in order,
+        but folds the statistics in one pass and applies decay once.
+        
+        Args:
+            activity_type: Type of activity (e.g., "cooking", "sleeping")
+            hours: Hour of day of each occurrence, oldest first
+            durations: Duration in minutes of each occurrence
+            zones: Zone of each occurrence, or one zone for all of them
+            speeds: Movement speed of each occurrence, or one speed for all
+        
+        Raises:
+            ValueError: if the inputs do not all have one entry per occurrence
+        """
+        hours, durations, zones, speeds = _observation_arrays(hours, durations, zones, speeds)
+        n = len(hours)
+        if n == 0:
+            return
+        
+        pattern = self._get_or_create_pattern(activity_type)
+        
+        self._fold_temporal_pattern(pattern.temporal, hours, durations)
+        self._fold_spatial_pattern(pattern.spatial, zones, speeds)
+        
+        # One decay step per observation for every pattern
+        self._clock.epoch += n
+        
+        self.total_observations += n
+    
+    def observe_activities(self, activity_types: Sequence[str], hours: Sequence[float],
+                           durations: Sequence[float],
+                           zones: Union[str, Sequence[str]],
+                           speeds: Union[float, Sequence[float]] = 1.0):
+        """
+        Observe a mixed sequence of activities at once.
+        
+        Equivalent to calling observe_activity for each occurrence in order.
+        Occurrences are grouped by activity and each group is folded in one
+        pass, with the decay between them accounted for from their positions
+        in the sequence.
+        
+        Args:
+            activity_types: Activity type of each occurrence, oldest first
+            hours: Hour of day of each occurrence
+            durations: Duration in minutes of each occurrence
+            zones: Zone of each occurrence, or one zone for all of them
+            speeds: Movement speed of each occurrence, or one speed for all
+        
+        Raises:
+            ValueError: if the inputs do not all have one entry per occurrence
+        """
+        hours, durations, zones, speeds = _observation_arrays(hours, durations, zones, speeds)
+        activity_types = np.asarray(activity_types, dtype=str).reshape(-1)
+        if len(activity_types) != len(hours):
+            raise ValueError(f"got {len(activity_types)} activity types for {len(hours)} hours")
+        n = len(hours)
+        if n == 0:
+            return
+        
+        names, ids = np.unique(activity_types, return_inverse=True)
+        order = np.argsort(ids, kind='stable')
+        groups = np.split(order, np.flatnonzero(np.diff(ids[order])) + 1)
+        
+        # Create patterns in order of first appearance, as observe_activity would
+        groups.sort(key=lambda group: group[0])
+        for steps in groups:
+            pattern = self._get_or_create_pattern(str(names[ids[steps[0]]]))
+            self._fold_temporal_pattern(pattern.temporal, hours[steps], durations[steps], steps)
+            self._fold_spatial_pattern(pattern.spatial, [zones[i] for i in steps.tolist()],
+                                       speeds[steps], steps)
+        
+        # One decay step per observation for every pattern
+        self._clock.epoch += n
+        
+        self.total_observations += n
+    
+    def _fold_temporal_pattern(self, temporal: TemporalPattern,
+                               hours: np.ndarray, durations: np.ndarray,
+                               steps: Optional[np.ndarray] = None):
+        """
+        Apply n temporal updates, with decay between them, in closed form.
+        
+        `steps` gives each update's offset from the current epoch (sorted
+        ascending) when other activities are interleaved; by default the
+        updates fall on consecutive epochs.
+        """
+        alpha = _ALPHA
+        d = self.decay_factor
+        n = len(hours)
+        last = n - 1 if steps is None else int(steps[-1])
+        
+        temporal._settle()
+        if temporal._observation_count == 0:
+            # First observations seed the statistics
+            temporal.active_hours_mean = float(hours[0])
+            temporal.active_hours_var = 0.0
+            temporal.typical_duration_mean = float(durations[0])
+            temporal.typical_duration_var = 0.0
+            hours, durations = hours[1:], durations[1:]
+        
+        # Stored as Python floats whichever kernel ran (the plain Python
+        # fallback returns NumPy scalars)
+        folded = map(float, ema_fold_temporal(
+            hours, durations, temporal.active_hours_mean, temporal.active_hours_var,
+            temporal.typical_duration_mean, temporal.typical_duration_lower_var,
+            temporal.typical_duration_upper_var, alpha, _DAY_HOURS))
+        (temporal.active_hours_mean, temporal.active_hours_var, temporal.typical_duration_mean,
+         temporal.typical_duration_lower_var, temporal.typical_duration_upper_var) = folded
+        
+        # count_k = count_{k-1} * d + 1, unrolled over n observations; the
+        # decay after the last one is left pending like any other update
+        if d == 1.0:
+            count = temporal._observation_count + n
+        elif steps is None:
+            power = self._clock.power
+            count = temporal._observation_count * power(n - 1) + (1 - power(n)) / (1 - d)
+        else:
+            count = (temporal._observation_count * self._clock.power(last)
+                     + float(self._clock.powers(last + 1)[steps].sum()))
+        temporal._observation_count = count
+        stability = count * _INV_STABLE_COUNT
+        temporal._pattern_stability = stability if stability < 1.0 else 1.0
+        temporal.last_epoch = self._clock.epoch + last
+        
+        temporal.last_updated = time.monotonic()
+    
+    def _fold_spatial_pattern(self, spatial: SpatialPattern,
+                              zones: Sequence[str], speeds: np.ndarray,
+                              steps: Optional[np.ndarray] = None):
+        """
+        Apply n spatial updates, with decay between them.
+        
+        `steps` is as for _fold_temporal_pattern.
+        """
+        alpha = _ALPHA
+        n = len(zones)
+        last = n - 1 if steps is None else int(steps[-1])
+        
+        # Bring counts up to the last observation's epoch; an observation
+        # k epochs before it has decayed by d^k by then
+        intern = self._zones.intern
+        zids = np.fromiter((intern(zone) for zone in zones), dtype=np.intp, count=n)
+        spatial._settle()
+        spatial._reserve(int(zids.max()))
+        powers = self._clock.powers(last + 1)
+        weights = powers if steps is None else powers[steps]
+        spatial._decay(float(powers[0]))
+        np.add.at(spatial._zone_counts, zids, weights / spatial._zone_scale)
+        spatial._zone_total += weights.sum()
+        spatial.last_epoch = self._clock.epoch + last
+        
+        if spatial.movement_speed_mean == 0:
+            # The first non-zero speed seeds the statistics
+            moving = np.flatnonzero(speeds)
+            spatial.movement_speed_var = 0.0
+            if moving.size == 0:
+                return
+            spatial.movement_speed_mean = float(speeds[moving[0]])
+            speeds = speeds[moving[0] + 1:]
+        
+        spatial.movement_speed_mean, spatial.movement_speed_var = map(float, ema_fold(
+            np.ascontiguousarray(speeds), spatial.movement_speed_mean,
+            spatial.movement_speed_var, alpha))
+    
     def _update_temporal_pattern(self, temporal: TemporalPattern, 
                                  hour: float, duration: float):
         """
         Update temporal pattern with exponential moving average.
         Old observations gradually forgotten.
         """
-        alpha = 0.2  # Learning rate
+        alpha = _ALPHA
+        keep = _KEEP
         
-        temporal.observation_count += 1
+        temporal._settle()
+        count = temporal._observation_count + 1
+        temporal._observation_count = count
         
-        # Update active hours (exponential moving average)
-        if temporal.observation_count == 1:
+        if count == 1:
             temporal.active_hours_mean = hour
-            temporal.active_hours_std = 0.0
+            temporal.active_hours_var = 0.0
+            temporal.typical_duration_mean = duration
+            temporal.typical_duration_var = 0.0
         else:
-            # Update mean
+            # Update active hours (exponential moving average on the 24-hour
+            # circle, so activities around midnight average to midnight); the
+            # running variance is updated against the previous mean, std is
+            # derived on read
             old_mean = temporal.active_hours_mean
-            temporal.active_hours_mean = (
-                alpha * hour + (1 - alpha) * temporal.active_hours_mean
-            )
+            diff = (hour - old_mean + _HALF_DAY_HOURS) % _DAY_HOURS - _HALF_DAY_HOURS
+            temporal.active_hours_mean = (old_mean + alpha * diff) % _DAY_HOURS
+            temporal.active_hours_var = alpha * (diff * diff) + keep * temporal.active_hours_var
             
-            # Update std (running variance estimation)
-            diff = hour - old_mean
-            temporal.active_hours_std = np.sqrt(
-                alpha * (diff ** 2) + (1 - alpha) * (temporal.active_hours_std ** 2)
-            )
-        
-        # Update duration
-        if temporal.observation_count == 1:
-            temporal.typical_duration_mean = duration
-            temporal.typical_duration_std = 0.0
-        else:
+            # Update duration; the squared deviation goes to the side of the
+            # previous mean it fell on, both sides fade alike
             old_mean = temporal.typical_duration_mean
-            temporal.typical_duration_mean = (
-                alpha * duration + (1 - alpha) * temporal.typical_duration_mean
-            )
-            
             diff = duration - old_mean
-            temporal.typical_duration_std = np.sqrt(
-                alpha * (diff ** 2) + (1 - alpha) * (temporal.typical_duration_std ** 2)
-            )
+            temporal.typical_duration_mean = alpha * duration + keep * old_mean
+            lower = keep * temporal.typical_duration_lower_var
+            upper = keep * temporal.typical_duration_upper_var
+            if diff > 0:
+                upper += alpha * (diff * diff)
+            else:
+                lower += alpha * (diff * diff)
+            temporal.typical_duration_lower_var = lower
+            temporal.typical_duration_upper_var = upper
         
         # Update pattern stability (how consistent observations are)
-        temporal.pattern_stability = min(1.0, temporal.observation_count / 20.0)
+        stability = count * _INV_STABLE_COUNT
+        temporal._pattern_stability = stability if stability < 1.0 else 1.0
         
-        temporal.last_updated = datetime.now()
+        temporal.last_updated = time.monotonic()
     
     def _update_spatial_pattern(self, spatial: SpatialPattern, 
                                zone: str, speed: float):
         """
         Update spatial pattern with zone frequency and movement stats.
         """
-        alpha = 0.2
-        
-        # Update zone frequency
-        if zone not in spatial.zone_frequencies:
-            spatial.zone_frequencies[zone] = 1.0
-        else:
-            spatial.zone_frequencies[zone] += 1.0
-        
-        # Normalize frequencies (keep as probabilities)
-        total = sum(spatial.zone_frequencies.values())
-        for z in spatial.zone_frequencies:
-            spatial.zone_frequencies[z] /= total
+        # Update zone visit count (frequencies are derived on read)
+        spatial._settle()
+        spatial._add_visits(self._zones.intern(zone), 1.0)
         
         # Update movement speed stats
-        if spatial.movement_speed_mean == 0:
+        old_mean = spatial.movement_speed_mean
+        if old_mean == 0:
             spatial.movement_speed_mean = speed
-            spatial.movement_speed_std = 0.0
+            spatial.movement_speed_var = 0.0
         else:
-            old_mean = spatial.movement_speed_mean
-            spatial.movement_speed_mean = (
-                alpha * speed + (1 - alpha) * spatial.movement_speed_mean
-            )
-            
             diff = speed - old_mean
-            spatial.movement_speed_std = np.sqrt(
-                alpha * (diff ** 2) + (1 - alpha) * (spatial.movement_speed_std ** 2)
+            spatial.movement_speed_mean = _ALPHA * speed + _KEEP * old_mean
+            spatial.movement_speed_var = (
+                _ALPHA * (diff * diff) + _KEEP * spatial.movement_speed_var
             )
     
     def _apply_decay(self):
         """
         Apply exponential decay to all patterns.
         This is the FORGETTING mechanism - old patterns fade over time.
+        
+        Advancing the shared clock ages every pattern at once; each pattern
+        applies the decay when it is next read or updated.
         """
-        for pattern in self.patterns.values():
-            # Decay observation count (older observations count less)
-            pattern.temporal.observation_count *= self.decay_factor
-            
-            # Decay pattern stability
-            pattern.temporal.pattern_stability *= self.decay_factor
-            
-            # Decay zone frequencies
-            for zone in pattern.spatial.zone_frequencies:
-                pattern.spatial.zone_frequencies[zone] *= self.decay_factor
+        self._clock.epoch += 1
     
     def get_pattern(self, activity_type: str) -> Optional[ActivityPattern]:
         """Get pattern for specific activity type."""
@@ -252,36 +758,90 @@ class PatternMemory:
             Tuple of (is_anomaly, deviation_score)
         """
         pattern = self.get_pattern(activity_type)
-        if not pattern or pattern.temporal.observation_count < 3:
+        if pattern is None or pattern.temporal.observation_count < 3:
             return False, 0.0  # Not enough data to determine
         
         temporal = pattern.temporal
         
-        # Calculate z-score for hour
-        if temporal.active_hours_std > 0:
-            hour_zscore = abs(
-                (current_hour - temporal.active_hours_mean) / temporal.active_hours_std
-            )
-        else:
-            hour_zscore = 0.0
+        # Calculate z-score for hour (the short way round the clock)
+        hour_std = temporal.active_hours_std
+        if hour_std < _MIN_HOUR_STD:
+            hour_std = _MIN_HOUR_STD
+        hour_diff = (
+            (current_hour - temporal.active_hours_mean + _HALF_DAY_HOURS) % _DAY_HOURS
+            - _HALF_DAY_HOURS
+        )
+        hour_zscore = math.fabs(hour_diff) / hour_std
         
-        # Calculate z-score for duration
-        if temporal.typical_duration_std > 0:
-            duration_zscore = abs(
-                (current_duration - temporal.typical_duration_mean) / 
-                temporal.typical_duration_std
-            )
+        # Calculate z-score for duration, against the spread on its side
+        centre, lower, upper = temporal._duration_spread()
+        if current_duration > centre:
+            duration_zscore = (current_duration - centre) / max(upper, _MIN_DURATION_STD)
         else:
-            duration_zscore = 0.0
+            duration_zscore = (centre - current_duration) / max(lower, _MIN_DURATION_STD)
         
         # Combined deviation
-        deviation = max(hour_zscore, duration_zscore)
+        deviation = hour_zscore if hour_zscore > duration_zscore else duration_zscore
         
         # Anomaly if deviation > 2 standard deviations
         is_anomaly = deviation > 2.0
         
         return is_anomaly, deviation
     
+    def detect_anomalies(self, activity_types: Union[str, Sequence[str]],
+                         hours: Sequence[float],
+                         durations: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Check many activities against their learned patterns at once.
+        
+        Vectorised equivalent of calling detect_anomaly for each activity.
+        
+        Args:
+            activity_types: Activity type of each occurrence, or one activity
+                type for all of them
+            hours: Hour of day of each occurrence
+            durations: Duration in minutes of each occurrence
+        
+        Returns:
+            Tuple of (is_anomaly, deviation_score) arrays
+        """
+        if isinstance(activity_types, str):
+            # One activity throughout: no need to group the occurrences
+            names = [activity_types]
+            ids = np.zeros(len(hours), dtype=np.intp)
+        else:
+            names, ids = np.unique(np.asarray(activity_types, dtype=str), return_inverse=True)
+        
+        # Per-activity hour mean and 1/std, duration centre and 1/spread below
+        # and above it; activities without enough data keep zeros, so their
+        # z-scores are 0
+        stats = np.zeros((5, len(names)))
+        for i, name in enumerate(names):
+            pattern = self.patterns.get(str(name))
+            if pattern is None or pattern.temporal.observation_count < 3:
+                continue
+            temporal = pattern.temporal
+            centre, lower, upper = temporal._duration_spread()
+            stats[0, i] = temporal.active_hours_mean
+            stats[1, i] = 1.0 / max(temporal.active_hours_std, _MIN_HOUR_STD)
+            stats[2, i] = centre
+            stats[3, i] = 1.0 / max(lower, _MIN_DURATION_STD)
+            stats[4, i] = 1.0 / max(upper, _MIN_DURATION_STD)
+        
+        hour_mean, hour_inv_std, duration_centre, lower_inv, upper_inv = stats[:, ids]
+        hour_diff = (
+            (np.asarray(hours, dtype=np.float64) - hour_mean + _HALF_DAY_HOURS) % _DAY_HOURS
+            - _HALF_DAY_HOURS
+        )
+        hour_zscore = np.abs(hour_diff) * hour_inv_std
+        duration_diff = np.asarray(durations, dtype=np.float64) - duration_centre
+        duration_zscore = np.where(duration_diff > 0, duration_diff * upper_inv,
+                                   -duration_diff * lower_inv)
+        
+        deviation = np.maximum(hour_zscore, duration_zscore)
+        
+        return deviation > 2.0, deviation
+    
     def summarize_patterns(self) -> str:
         """
         Generate human-readable summary of learned patterns.
@@ -290,55 +850,56 @@ class PatternMemory:
         if not self.patterns:
             return "No patterns learned yet."
         
-        summary = []
-        summary.append("=" * 70)
-        summary.append("LEARNED BEHAVIORAL PATTERNS")
-        summary.append("=" * 70)
-        summary.append("")
+        rule = "=" * 70
+        buf = io.StringIO()
+        w = buf.write
+        
+        w(f"{rule}\nLEARNED BEHAVIORAL PATTERNS\n{rule}\n\n")
         
         for activity_type, pattern in self.patterns.items():
-            summary.append(f"Activity: {activity_type.upper()}")
-            summary.append("-" * 70)
-            
             t = pattern.temporal
             s = pattern.spatial
             
+            w(f"Activity: {activity_type.upper()}\n")
+            w("-" * 70 + "\n")
+            
             # Temporal summary
-            summary.append(f"  Temporal Pattern:")
-            summary.append(f"    • Typically occurs around: {t.active_hours_mean:.1f}:00 "
-                         f"(±{t.active_hours_std:.1f} hours)")
-            summary.append(f"    • Typical duration: {t.typical_duration_mean:.1f} minutes "
-                         f"(±{t.typical_duration_std:.1f} min)")
-            summary.append(f"    • Pattern confidence: {t.pattern_stability:.2f}")
-            summary.append(f"    • Observations: ~{int(t.observation_count)}")
+            w(f"  Temporal Pattern:\n"
+              f"    • Typically occurs around: {t.active_hours_mean:.1f}:00 "
+              f"(±{t.active_hours_std:.1f} hours)\n"
+              f"    • Typical duration: {t.typical_duration_mean:.1f} minutes "
+              f"(±{t.typical_duration_std:.1f} min)\n"
+              f"    • Pattern confidence: {t.pattern_stability:.2f}\n"
+              f"    • Observations: ~{int(t.observation_count)}\n")
             
             # Spatial summary
-            summary.append(f"  Spatial Pattern:")
-            if s.zone_frequencies:
-                summary.append(f"    • Common zones:")
-                for zone, freq in sorted(s.zone_frequencies.items(), 
-                                        key=lambda x: x[1], reverse=True):
-                    summary.append(f"      - {zone}: {freq*100:.1f}% of time")
-            summary.append(f"    • Movement speed: {s.movement_speed_mean:.2f} m/s "
-                         f"(±{s.movement_speed_std:.2f})")
-            
-            summary.append("")
-        
-        summary.append("=" * 70)
-        summary.append("PRIVACY PROPERTIES VERIFIED:")
-        summary.append("  ✓ No specific timestamps stored")
-        summary.append("  ✓ No detailed event logs")
-        summary.append("  ✓ Only statistical summaries maintained")
-        summary.append("  ✓ Cannot reconstruct individual events")
-        summary.append("  ✓ Old patterns fade through decay mechanism")
-        summary.append("=" * 70)
-        
-        return "\n".join(summary)
+            w("  Spatial Pattern:\n")
+            top_zones = s.top_zones(10)
+            if top_zones:
+                w("    • Common zones:\n")
+                for zone, freq in top_zones:
+                    w(f"      - {zone}: {freq*100:.1f}% of time\n")
+            w(f"    • Movement speed: {s.movement_speed_mean:.2f} m/s "
+              f"(±{s.movement_speed_std:.2f})\n\n")
+        
+        w(f"{rule}\n"
+          "PRIVACY PROPERTIES VERIFIED:\n"
+          "  ✓ No specific timestamps stored\n"
+          "  ✓ No detailed event logs\n"
+          "  ✓ Only statistical summaries maintained\n"
+          "  ✓ Cannot reconstruct individual events\n"
+          "  ✓ Old patterns fade through decay mechanism\n"
+          f"{rule}")
+        
+        return buf.getvalue()
 
 
-def run_demo():
+def run_demo(pause: Callable[[float], None] = time.sleep):
     """
     Demonstrate pattern memory with simulated daily activities.
+    
+    Args:
+        pause: Called with a delay in seconds between scenarios
     """
     print("=" * 70)
     print("PATTERN MEMORY SYSTEM DEMO")
@@ -353,70 +914,40 @@ def run_demo():
     print("-" * 70)
     print()
     
-    # Simulate 2 weeks of activities
-    print("Week 1: Establishing patterns...")
-    for day in range(7):
-        # Morning routine (breakfast)
-        breakfast_time = np.random.normal(7.5, 0.3)  # ~7:30 AM ± 20 min
-        memory.observe_activity(
-            activity_type="breakfast",
-            hour=breakfast_time,
-            duration_minutes=np.random.normal(25, 5),  # ~25 min
-            zone="kitchen",
-            movement_speed=1.2
-        )
-        
-        # Afternoon activity (reading)
-        reading_time = np.random.normal(14.0, 0.5)  # ~2:00 PM
-        memory.observe_activity(
-            activity_type="reading",
-            hour=reading_time,
-            duration_minutes=np.random.normal(60, 10),  # ~60 min
-            zone="living_room",
-            movement_speed=0.3
-        )
-        
-        # Evening routine (dinner)
-        dinner_time = np.random.normal(18.5, 0.4)  # ~6:30 PM
-        memory.observe_activity(
-            activity_type="dinner",
-            hour=dinner_time,
-            duration_minutes=np.random.normal(35, 7),  # ~35 min
-            zone="kitchen",
-            movement_speed=1.1
-        )
-        
-        print(f"  Day {day + 1}: Observed breakfast, reading, dinner")
-    
-    print()
-    time.sleep(1)
+    # Daily routine: activity, hour mean/std, duration mean/std (minutes),
+    # zone and movement speed
+    routine = (
+        ("breakfast", 7.5, 0.3, 25, 5, "kitchen", 1.2),      # ~7:30 AM ± 20 min
+        ("reading", 14.0, 0.5, 60, 10, "living_room", 0.3),  # ~2:00 PM
+        ("dinner", 18.5, 0.4, 35, 7, "kitchen", 1.1),        # ~6:30 PM
+    )
+    activities, hour_means, hour_stds, minute_means, minute_stds, zones, speeds = zip(*routine)
+    rng = np.random.default_rng()
     
-    print("Week 2: Reinforcing patterns...")
-    for day in range(7, 14):
-        # Same routine with slight variations
-        breakfast_time = np.random.normal(7.5, 0.3)
-        memory.observe_activity("breakfast", breakfast_time, 
-                              np.random.normal(25, 5), "kitchen", 1.2)
-        
-        reading_time = np.random.normal(14.0, 0.5)
-        memory.observe_activity("reading", reading_time,
-                              np.random.normal(60, 10), "living_room", 0.3)
-        
-        dinner_time = np.random.normal(18.5, 0.4)
-        memory.observe_activity("dinner", dinner_time,
-                              np.random.normal(35, 7), "kitchen", 1.1)
+    # Simulate 2 weeks of activities, observing each week's days in order
+    # (breakfast, reading, dinner, next day, ...) with one call
+    for week, phase in enumerate(("Establishing", "Reinforcing")):
+        print(f"Week {week + 1}: {phase} patterns...")
+        memory.observe_activities(
+            activities * 7,
+            hours=rng.normal(hour_means, hour_stds, (7, len(routine))).ravel(),
+            durations=rng.normal(minute_means, minute_stds, (7, len(routine))).ravel(),
+            zones=zones * 7,
+            speeds=np.tile(speeds, 7)
+        )
         
-        print(f"  Day {day + 1}: Observed breakfast, reading, dinner")
+        for day in range(week * 7, week * 7 + 7):
+            print(f"  Day {day + 1}: Observed breakfast, reading, dinner")
+        print()
+        pause(1)
     
-    print()
     print("✓ Total observations: ", memory.total_observations)
     print()
-    time.sleep(1)
     
     # Show learned patterns
     print(memory.summarize_patterns())
     print()
-    time.sleep(2)
+    pause(2)
     
     # Test anomaly detection
     print("Scenario: Testing anomaly detection")
@@ -443,7 +974,7 @@ def run_demo():
     print("  → Robot might check: 'Activity duration unusual'")
     print()
     
-    time.sleep(1)
+    pause(1)
     
     # Demonstrate privacy properties
     print("=" * 70)
@@ -490,4 +1021,4 @@ def run_demo():
 
 
 if __name__ == "__main__":
-    run_demo()
+    run_demo_cli(run_demo, "Pattern memory demo")
@@ -0,0 +1,14 @@
+"""
+Shared pytest configuration for the test suite.
+
+Author: Agus Setiawan
+License: GPL-3.0
+"""
+
+import os
+import sys
+
+# Make the examples package importable from every test module
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
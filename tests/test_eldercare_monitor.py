@@ -8,18 +8,17 @@ Author: Agus Setiawan
 License: GPL-3.0
 """
 
+import dataclasses
 import pytest
-import sys
-import os
 from datetime import datetime, timedelta
 
-# Add examples to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-
 from examples.eldercare_fall_detection import (
     BehavioralFeatures,
     SensorEvent,
-    EldercareMonitor
+    SensorEventBatch,
+    EventType,
+    EldercareMonitor,
+    EldercareFleet
 )
 
 
@@ -71,6 +70,34 @@ class TestSensorEvent:
         )
         
         assert event.duration == 0.0
+    
+    def test_sensor_event_type_code(self):
+        """Test event type string is mapped to its EventType code"""
+        event = SensorEvent(datetime.now(), "pressure", "hallway", 2.0)
+        unknown = SensorEvent(datetime.now(), "doorbell", "hallway", 1.0)
+        
+        assert event.event_code == EventType.PRESSURE
+        assert event.event_type == "pressure"
+        assert unknown.event_code not in list(EventType)
+    
+    def test_sensor_event_timestamp_ns(self):
+        """Test event timestamp is mirrored as integer POSIX nanoseconds"""
+        when = datetime(2024, 3, 1, 8, 15, 30, 250000)
+        event = SensorEvent(when, "movement", "kitchen", 1.0)
+        
+        assert isinstance(event.timestamp_ns, int)
+        assert event.timestamp_ns == int(when.timestamp() * 1_000_000) * 1000
+        assert datetime.fromtimestamp(event.timestamp_ns / 1e9) == when
+    
+    def test_sensor_event_is_immutable(self):
+        """Test derived fields cannot go stale through field reassignment"""
+        event = SensorEvent(datetime.now(), "movement", "kitchen", 1.0)
+        
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            event.event_type = "pressure"
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            event.timestamp = datetime(2024, 3, 1, 8)
+        assert event.event_code == EventType.MOVEMENT
 
 
 class TestEldercareMonitor:
@@ -192,6 +219,37 @@ class TestEldercareMonitor:
         assert response['alert'] is False
         assert monitor.current_zone == "bedroom"
     
+    def test_typical_active_hours_learned_from_movement(self):
+        """Test movement events mark their hour as typically active"""
+        monitor = EldercareMonitor()
+        
+        for hour in (18, 7, 7, 12):
+            monitor.process_sensor_event(SensorEvent(
+                timestamp=datetime.now().replace(hour=hour),
+                event_type="movement",
+                zone="kitchen",
+                intensity=1.0
+            ))
+        
+        assert monitor.typical_active_hours == [7, 12, 18]
+        
+        monitor.typical_active_hours = [23, 0]
+        assert monitor.typical_active_hours == [0, 23]
+    
+    def test_occasional_hours_are_not_typical(self):
+        """Test an hour with few movements relative to the busiest is not typical"""
+        monitor = EldercareMonitor()
+        
+        for hour in [7] * 8 + [12] * 3 + [3]:
+            monitor.process_sensor_event(SensorEvent(
+                timestamp=datetime.now().replace(hour=hour),
+                event_type="movement",
+                zone="kitchen",
+                intensity=1.0
+            ))
+        
+        assert monitor.typical_active_hours == [7, 12]
+    
     def test_check_inactivity_normal(self):
         """Test inactivity check with normal activity"""
         monitor = EldercareMonitor()
@@ -222,6 +280,30 @@ class TestEldercareMonitor:
         assert response['alert_type'] == 'UNUSUAL_INACTIVITY'
         assert response['confidence'] > 0
     
+    def test_check_inactivity_accepts_timestamp(self):
+        """Test inactivity check with a POSIX timestamp"""
+        monitor = EldercareMonitor()
+        
+        current_time = datetime.now().replace(hour=9, minute=0)
+        monitor.last_movement_time = current_time - timedelta(minutes=40)
+        monitor.typical_active_hours = [7, 8, 9, 10]
+        
+        response = monitor.check_inactivity(current_time.timestamp())
+        
+        assert response['alert'] is True
+        assert response['alert_type'] == 'UNUSUAL_INACTIVITY'
+    
+    def test_local_hour_matches_datetime(self):
+        """Test the cached hour window agrees with datetime across hour edges"""
+        monitor = EldercareMonitor()
+        start = datetime(2024, 3, 1, 6, 58).timestamp()
+        
+        # Step across several hour boundaries, forwards then backwards
+        steps = [start + 37.5 * i for i in range(400)]
+        for ts in steps + steps[::-1]:
+            ts_ns = round(ts * 1_000_000) * 1000
+            assert monitor._local_hour(ts, ts_ns) == datetime.fromtimestamp(ts).hour
+
     def test_check_inactivity_not_during_active_hours(self):
         """Test inactivity during non-active hours (no alert)"""
         monitor = EldercareMonitor()
@@ -270,6 +352,16 @@ class TestEldercareMonitor:
         period = monitor._get_time_period(night_time)
         
         assert period == "night"
+    
+    def test_get_time_period_boundaries(self):
+        """Test each period starts and ends on the expected hour"""
+        monitor = EldercareMonitor()
+        expected = {4: "night", 5: "morning", 11: "morning", 12: "afternoon",
+                    16: "afternoon", 17: "evening", 21: "evening", 22: "night",
+                    23: "night", 0: "night"}
+        
+        for hour, period in expected.items():
+            assert monitor._get_time_period(datetime.now().replace(hour=hour)) == period
 
 
 class TestPrivacyProperties:
@@ -422,6 +514,65 @@ class TestIntegration:
         assert response2['alert_type'] == 'POTENTIAL_FALL'
         assert monitor.fall_detected is True
     
+    def test_batch_matches_sequential_processing(self):
+        """Test batch processing produces the same responses and state"""
+        start = datetime.now().replace(hour=6, minute=0)
+        events = [
+            SensorEvent(start, "movement", "bedroom", 1.0),
+            SensorEvent(start + timedelta(hours=2), "movement", "kitchen", 1.1),
+            SensorEvent(start + timedelta(hours=3), "pressure", "kitchen", 3.0, 2.0),
+            SensorEvent(start + timedelta(hours=4), "pressure", "bathroom", 10.0, 0.1),
+            SensorEvent(start + timedelta(hours=5), "thermal", "living_room", 0.5),
+            SensorEvent(start + timedelta(hours=6), "doorbell", "hallway", 1.0),
+        ]
+        
+        sequential = EldercareMonitor()
+        expected = [sequential.process_sensor_event(e) for e in events]
+        
+        batched = EldercareMonitor()
+        responses = batched.process_batch(SensorEventBatch.from_events(events))
+        
+        assert [dict(r) for r in responses] == [dict(r) for r in expected]
+        assert batched.fall_detected is sequential.fall_detected is True
+        assert batched.activity_count_today == sequential.activity_count_today == 2
+        assert batched.typical_active_hours == sequential.typical_active_hours == [6, 8]
+        assert batched.current_zone == sequential.current_zone == "living_room"
+        assert batched.last_movement_time == sequential.last_movement_time
+    
+    def test_process_event_list(self):
+        """Test a plain list of events is processed like the same events one by one"""
+        start = datetime.now().replace(hour=9, minute=0)
+        events = [
+            SensorEvent(start, "movement", "kitchen", 1.0),
+            SensorEvent(start + timedelta(minutes=5), "pressure", "kitchen", 9.0, 0.3),
+            SensorEvent(start + timedelta(minutes=9), "movement", "hallway", 1.2),
+        ]
+        
+        sequential = EldercareMonitor()
+        expected = [dict(sequential.process_sensor_event(e)) for e in events]
+        
+        monitor = EldercareMonitor()
+        responses = monitor.process_sensor_events(events)
+        
+        assert [dict(r) for r in responses] == expected
+        assert monitor.last_movement_time == sequential.last_movement_time
+        assert monitor.current_zone == "hallway"
+        assert monitor.process_sensor_events([]) == []
+    
+    def test_batch_with_many_zones(self):
+        """Test a batch can span more distinct zones than fit in a byte"""
+        start = datetime.now().replace(hour=9, minute=0)
+        events = [SensorEvent(start + timedelta(seconds=i), "movement", f"zone_{i}", 1.0)
+                  for i in range(300)]
+        
+        batch = SensorEventBatch.from_events(events)
+        assert len(batch.zones) == 300
+        assert batch.zones[batch.zone_code[-1]] == "zone_299"
+        
+        monitor = EldercareMonitor()
+        monitor.process_sensor_events(events)
+        assert monitor.current_zone == "zone_299"
+    
     def test_inactivity_detection_scenario(self):
         """Test complete inactivity detection scenario"""
         monitor = EldercareMonitor()
@@ -448,6 +599,127 @@ class TestIntegration:
         assert response['alert_type'] == 'UNUSUAL_INACTIVITY'
 
 
+class TestEldercareFleet:
+    """Test facility-level inactivity checks across many monitors"""
+    
+    def _fleet(self, names):
+        fleet = EldercareFleet()
+        for name in names:
+            monitor = fleet.add_monitor(name, EldercareMonitor(emit=lambda msg: None))
+            monitor.typical_active_hours = [7, 8, 9, 10]
+        return fleet
+    
+    def _move(self, fleet, name, when):
+        fleet.process_sensor_event(name, SensorEvent(
+            timestamp=when,
+            event_type="movement",
+            zone="kitchen",
+            intensity=1.0
+        ))
+    
+    def test_only_inactive_residents_alert(self):
+        """Test the sweep alerts for exactly the residents past their threshold"""
+        fleet = self._fleet(["a", "b", "c"])
+        now = datetime.now().replace(hour=9, minute=0)
+        
+        self._move(fleet, "a", now - timedelta(minutes=45))
+        self._move(fleet, "b", now - timedelta(minutes=5))
+        self._move(fleet, "c", now - timedelta(minutes=50))
+        
+        alerts = fleet.check_inactivity(now)
+        
+        assert set(alerts) == {"a", "c"}
+        assert all(r['alert_type'] == 'UNUSUAL_INACTIVITY' for r in alerts.values())
+    
+    def test_new_movement_clears_pending_alert(self):
+        """Test a resident who moves again drops out of the sweep"""
+        fleet = self._fleet(["a"])
+        now = datetime.now().replace(hour=9, minute=0)
+        
+        self._move(fleet, "a", now - timedelta(minutes=45))
+        assert set(fleet.check_inactivity(now)) == {"a"}
+        
+        self._move(fleet, "a", now)
+        assert fleet.check_inactivity(now + timedelta(minutes=10)) == {}
+    
+    def test_inactive_resident_alerts_on_every_sweep(self):
+        """Test a still-inactive resident stays due, like a single monitor"""
+        fleet = self._fleet(["a"])
+        now = datetime.now().replace(hour=9, minute=0)
+        
+        self._move(fleet, "a", now - timedelta(minutes=45))
+        
+        assert "a" in fleet.check_inactivity(now)
+        assert "a" in fleet.check_inactivity(now + timedelta(minutes=5))
+    
+    def test_no_alert_outside_active_hours(self):
+        """Test the monitor's learned hours still gate the alert"""
+        fleet = self._fleet(["a"])
+        now = datetime.now().replace(hour=3, minute=0)
+        
+        self._move(fleet, "a", now - timedelta(minutes=120))
+        
+        assert fleet.check_inactivity(now) == {}
+    
+    def test_threshold_change_moves_deadline(self):
+        """Test lowering a monitor's threshold brings its resident into the sweep"""
+        fleet = self._fleet(["a"])
+        now = datetime.now().replace(hour=9, minute=0)
+        
+        self._move(fleet, "a", now - timedelta(minutes=20))
+        assert fleet.check_inactivity(now) == {}
+        
+        fleet.monitors["a"].inactivity_threshold_minutes = 10
+        assert set(fleet.check_inactivity(now)) == {"a"}
+        
+        fleet.monitors["a"].inactivity_threshold_minutes = 60
+        assert fleet.check_inactivity(now + timedelta(minutes=5)) == {}
+    
+    def test_events_processed_directly_on_monitor(self):
+        """Test movements that bypass the fleet still move the deadline"""
+        fleet = self._fleet(["a", "b"])
+        now = datetime.now().replace(hour=9, minute=0)
+        self._move(fleet, "a", now - timedelta(minutes=5))
+        self._move(fleet, "b", now - timedelta(minutes=5))
+        
+        fleet.monitors["a"].process_sensor_event(
+            SensorEvent(now - timedelta(minutes=45), "movement", "kitchen", 1.0))
+        fleet.monitors["b"].process_batch(SensorEventBatch.from_events(
+            [SensorEvent(now - timedelta(minutes=50), "movement", "kitchen", 1.0)]))
+        assert set(fleet.check_inactivity(now)) == {"a", "b"}
+        
+        fleet.monitors["a"].process_sensor_event(
+            SensorEvent(now, "movement", "kitchen", 1.0))
+        fleet.monitors["b"].process_batch(SensorEventBatch.from_events(
+            [SensorEvent(now, "movement", "kitchen", 1.0)]))
+        assert fleet.check_inactivity(now + timedelta(minutes=10)) == {}
+    
+    def test_inactivity_deadline_property(self):
+        """Test the deadline is the last movement plus the threshold, in int ns"""
+        monitor = EldercareMonitor()
+        monitor.last_movement_time = datetime(2024, 3, 1, 9, 0)
+        monitor.inactivity_threshold_minutes = 15
+        
+        assert monitor.inactivity_deadline_ns == int(
+            datetime(2024, 3, 1, 9, 15).timestamp()) * 1_000_000_000
+        
+        monitor.inactivity_threshold_minutes = 7.5
+        assert isinstance(monitor.inactivity_deadline_ns, int)
+        assert monitor.inactivity_deadline_ns == int(
+            datetime(2024, 3, 1, 9, 7, 30).timestamp()) * 1_000_000_000
+    
+    def test_monitor_cannot_join_two_fleets(self):
+        """Test a monitor already reporting to one fleet is refused by another"""
+        first = self._fleet(["a"])
+        
+        with pytest.raises(ValueError):
+            EldercareFleet().add_monitor("a", first.monitors["a"])
+        
+        now = datetime.now().replace(hour=9, minute=0)
+        self._move(first, "a", now - timedelta(minutes=45))
+        assert set(first.check_inactivity(now)) == {"a"}
+
+
 class TestAlertResponses:
     """Test alert response generation"""
     
@@ -470,6 +742,40 @@ class TestAlertResponses:
         assert response['confidence'] > 0
         assert len(response['message']) > 0
     
+    def test_fall_confidence_grows_with_impact(self):
+        """Test harder impacts raise fall confidence, up to a cap"""
+        monitor = EldercareMonitor()
+        
+        def fall_confidence(intensity):
+            event = SensorEvent(datetime.now(), "pressure", "bathroom", intensity, 0.2)
+            return monitor.process_sensor_event(event)['confidence']
+        
+        assert fall_confidence(8.5) < fall_confidence(10.0) < fall_confidence(11.0)
+        assert fall_confidence(50.0) == 0.95
+    
+    def test_fall_thresholds_are_configurable(self):
+        """Test a monitor uses its own fall thresholds in both processing paths"""
+        monitor = EldercareMonitor(fall_intensity_threshold=5.0, fall_duration_threshold=1.0)
+        event = SensorEvent(datetime.now(), "pressure", "bedroom", 6.0, 0.8)
+        
+        assert monitor.fall_intensity_threshold == 5.0
+        assert EldercareMonitor().process_sensor_event(event)['alert'] is False
+        assert monitor.process_sensor_event(event)['alert'] is True
+        assert monitor.process_sensor_events([event])[0]['alert'] is True
+        assert monitor.process_sensor_event(event)['confidence'] == pytest.approx(0.88)
+    
+    def test_alert_messages_go_to_emit(self, capsys):
+        """Test alert text is routed through the monitor's emit callback"""
+        messages = []
+        monitor = EldercareMonitor(emit=messages.append)
+        
+        fall_event = SensorEvent(datetime.now(), "pressure", "bathroom", 9.0, 0.2)
+        monitor.process_sensor_event(fall_event)
+        
+        assert any("ALERT" in m for m in messages)
+        assert any("bathroom" in m for m in messages)
+        assert capsys.readouterr().out == ""
+    
     def test_inactivity_alert_message(self):
         """Test inactivity alert contains pattern information"""
         monitor = EldercareMonitor()
@@ -484,7 +790,20 @@ class TestAlertResponses:
         assert 'message' in response
         assert 'movement' in response['message'].lower() or \
                'activity' in response['message'].lower()
-
-
-if __name__ == "__main__":
-    pytest.main([__file__, "-v"])
+    
+    def test_no_alert_response_is_read_only(self):
+        """Test shared no-alert response cannot be mutated by callers"""
+        monitor = EldercareMonitor()
+        
+        event = SensorEvent(
+            timestamp=datetime.now(),
+            event_type="thermal",
+            zone="bedroom",
+            intensity=7.0
+        )
+        
+        response = monitor.process_sensor_event(event)
+        
+        assert response['alert'] is False
+        with pytest.raises(TypeError):
+            response['alert'] = True
@@ -9,18 +9,18 @@ License: GPL-3.0
 """
 
 import pytest
-import sys
-import os
 from datetime import datetime, timedelta
 
-# Add examples to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import numpy as np
 
+import examples.ephemeral_identity_demo as demo
 from examples.ephemeral_identity_demo import (
     BehavioralFeatures,
     EntityProfile,
-    EphemeralIdentityManager
+    EphemeralIdentityManager,
+    _IdPool
 )
+from examples._matcher import MAX_DISTANCE, _find_best_loop, _find_best_numpy
 
 
 class TestBehavioralFeatures:
@@ -58,6 +58,22 @@ class TestBehavioralFeatures:
         assert vector[2] == 0  # morning encoded as 0
         assert vector[3] == 0  # kitchen encoded as 0
         assert vector[4] == 0  # steady encoded as 0
+    
+    def test_to_vector_is_cached(self):
+        """Test vector is built once per features instance"""
+        features = BehavioralFeatures(
+            movement_speed=1.2,
+            height_estimate=1.75,
+            activity_time="evening",
+            interaction_zone="bedroom",
+            movement_pattern="variable"
+        )
+        
+        vector = features.to_vector()
+        
+        assert features.to_vector() is vector
+        assert not vector.flags.writeable
+        assert list(vector[2:]) == [2, 2, 1]
 
 
 class TestEntityProfile:
@@ -104,6 +120,42 @@ class TestEntityProfile:
         
         assert profile.is_expired(expiry_days=30)
     
+    def test_update_refreshes_expiry(self):
+        """Test a new observation keeps an old profile from expiring"""
+        old_time = datetime.now() - timedelta(days=35)
+        profile = EntityProfile(
+            entity_id="test_123",
+            first_observed=old_time,
+            last_seen=old_time,
+            observation_count=1
+        )
+        
+        profile.update(BehavioralFeatures(
+            movement_speed=1.2,
+            height_estimate=1.75,
+            activity_time="morning",
+            interaction_zone="kitchen",
+            movement_pattern="steady"
+        ))
+        
+        assert not profile.is_expired(expiry_days=30)
+        assert datetime.now() - profile.last_seen < timedelta(minutes=1)
+    
+    def test_setting_last_seen_moves_expiry(self):
+        """Test last_seen is read from and written to the monotonic sighting time"""
+        now = datetime.now()
+        profile = EntityProfile(
+            entity_id="test_123",
+            first_observed=now,
+            last_seen=now,
+            observation_count=1
+        )
+        
+        profile.last_seen = now - timedelta(days=35)
+        
+        assert profile.is_expired(expiry_days=30)
+        assert now - profile.last_seen > timedelta(days=34)
+    
     def test_update_increases_confidence(self):
         """Test that updates increase confidence"""
         features = BehavioralFeatures(
@@ -127,6 +179,35 @@ class TestEntityProfile:
         
         assert profile.confidence > initial_confidence
         assert profile.observation_count == 1
+    
+    def test_update_averages_all_feature_dimensions(self):
+        """Test the moving average covers categorical dimensions too"""
+        morning = BehavioralFeatures(
+            movement_speed=1.0,
+            height_estimate=1.7,
+            activity_time="morning",
+            interaction_zone="kitchen",
+            movement_pattern="steady"
+        )
+        evening = BehavioralFeatures(
+            movement_speed=2.0,
+            height_estimate=1.7,
+            activity_time="evening",
+            interaction_zone="bedroom",
+            movement_pattern="variable"
+        )
+        
+        profile = EntityProfile(
+            entity_id="test_123",
+            first_observed=datetime.now(),
+            last_seen=datetime.now(),
+            typical_features=morning
+        )
+        profile.update(evening)
+        
+        expected = 0.7 * morning.to_vector() + 0.3 * evening.to_vector()
+        assert np.allclose(profile.typical_vec, expected)
+        assert np.array_equal(morning.to_vector(), [1.0, 1.7, 0, 0, 0])
 
 
 class TestEphemeralIdentityManager:
@@ -159,6 +240,16 @@ class TestEphemeralIdentityManager:
         
         assert len(ids) == len(set(ids))  # All unique
     
+    def test_id_pool_refills_when_drained(self):
+        """Test the ID pool keeps issuing fresh tokens across refills"""
+        manager = EphemeralIdentityManager()
+        manager._id_pool = _IdPool(size=4)
+        
+        ids = [manager.generate_entity_id() for _ in range(10)]
+        
+        assert len(set(ids)) == 10
+        assert all(len(eid) == len("entity_") + 32 for eid in ids)
+    
     def test_calculate_similarity_identical(self):
         """Test similarity calculation for identical features"""
         manager = EphemeralIdentityManager()
@@ -329,6 +420,296 @@ class TestEphemeralIdentityManager:
         assert expired_count == 1
         assert "old_entity" not in manager.entities
         assert "recent_entity" in manager.entities
+    
+    def test_detect_entity_uses_supplied_timestamp(self):
+        """Test a caller-supplied observation time is recorded as last seen"""
+        manager = EphemeralIdentityManager()
+        features = BehavioralFeatures(
+            movement_speed=1.2,
+            height_estimate=1.75,
+            activity_time="morning",
+            interaction_zone="kitchen",
+            movement_pattern="steady"
+        )
+        now = demo._now()
+        
+        entity_id, _ = manager.detect_entity(features, ts=now)
+        assert manager.entities[entity_id].last_seen_ts == now
+        
+        manager.detect_entity(features, ts=now + 5.0)
+        assert manager.entities[entity_id].last_seen_ts == now + 5.0
+    
+    def test_cleanup_uses_latest_sighting(self, monkeypatch):
+        """Test cleanup expires by most recent sighting and keeps the index usable"""
+        clock = [1000.0]
+        monkeypatch.setattr(demo, "_now", lambda: clock[0])
+        manager = EphemeralIdentityManager(expiry_days=30)
+        
+        def features(speed):
+            return BehavioralFeatures(
+                movement_speed=speed,
+                height_estimate=1.75,
+                activity_time="morning",
+                interaction_zone="kitchen",
+                movement_pattern="steady"
+            )
+        
+        stale_id, _ = manager.detect_entity(features(0.4))
+        active_id, _ = manager.detect_entity(features(2.0))
+        
+        clock[0] += 20 * 86400
+        manager.detect_entity(features(2.0))  # Seen again
+        clock[0] += 15 * 86400
+        
+        assert manager.cleanup_expired_entities() == 1
+        assert list(manager.entities) == [active_id]
+        assert manager.find_matching_entity(features(2.0)) == active_id
+        assert manager.find_matching_entity(features(0.4)) is None
+    
+    def test_changing_expiry_period_reschedules(self, monkeypatch):
+        """Test a shorter expiry period applies to entities already tracked"""
+        clock = [1000.0]
+        monkeypatch.setattr(demo, "_now", lambda: clock[0])
+        manager = EphemeralIdentityManager(expiry_days=30)
+        manager.detect_entity(BehavioralFeatures(1.0, 1.7, "morning", "kitchen", "steady"))
+        
+        clock[0] += 2 * 86400
+        assert manager.cleanup_expired_entities() == 0
+        
+        manager.expiry_days = 1
+        assert manager.cleanup_expired_entities() == 1
+        assert len(manager.entities) == 0
+    
+    def test_expiry_seen_by_matching_is_still_cleaned_up(self, monkeypatch):
+        """Test entities flagged as expired during matching are removed by cleanup"""
+        clock = [1000.0]
+        monkeypatch.setattr(demo, "_now", lambda: clock[0])
+        manager = EphemeralIdentityManager(expiry_days=30)
+        features = BehavioralFeatures(
+            movement_speed=1.2,
+            height_estimate=1.75,
+            activity_time="morning",
+            interaction_zone="kitchen",
+            movement_pattern="steady"
+        )
+        
+        entity_id, _ = manager.detect_entity(features)
+        clock[0] += 31 * 86400
+        
+        assert manager.find_matching_entity(features) is None
+        assert entity_id in manager.entities
+        assert manager.cleanup_expired_entities() == 1
+        assert manager.entities == {}
+    
+    def test_find_matching_entity_picks_closest(self):
+        """Test matching returns the most similar of several entities"""
+        manager = EphemeralIdentityManager()
+        
+        ids = []
+        for speed in (0.4, 1.2, 2.0):
+            entity_id, _ = manager.detect_entity(BehavioralFeatures(
+                movement_speed=speed,
+                height_estimate=1.75,
+                activity_time="morning",
+                interaction_zone="kitchen",
+                movement_pattern="steady"
+            ))
+            ids.append(entity_id)
+        
+        probe = BehavioralFeatures(
+            movement_speed=1.25,
+            height_estimate=1.75,
+            activity_time="morning",
+            interaction_zone="kitchen",
+            movement_pattern="steady"
+        )
+        
+        assert len(set(ids)) == 3
+        assert manager.find_matching_entity(probe) == ids[1]
+    
+    def test_expired_entity_not_matched(self):
+        """Test expired entities are skipped during matching"""
+        manager = EphemeralIdentityManager(expiry_days=30)
+        
+        features = BehavioralFeatures(
+            movement_speed=1.2,
+            height_estimate=1.75,
+            activity_time="morning",
+            interaction_zone="kitchen",
+            movement_pattern="steady"
+        )
+        old_time = datetime.now() - timedelta(days=35)
+        manager.entities["old_entity"] = EntityProfile(
+            entity_id="old_entity",
+            first_observed=old_time,
+            last_seen=old_time,
+            observation_count=5,
+            typical_features=features
+        )
+        
+        assert manager.find_matching_entity(features) is None
+        
+        entity_id, is_new = manager.detect_entity(features)
+        
+        assert is_new is True
+        assert entity_id != "old_entity"
+        assert manager.find_matching_entity(features) == entity_id
+    
+    def test_matching_agrees_with_calculate_similarity(self):
+        """Test the pre-weighted index scores matches like calculate_similarity"""
+        manager = EphemeralIdentityManager(similarity_threshold=0.7)
+        stored = BehavioralFeatures(1.2, 1.75, "morning", "kitchen", "steady")
+        entity_id, _ = manager.detect_entity(stored)
+        
+        close = BehavioralFeatures(1.25, 1.72, "morning", "kitchen", "steady")
+        far = BehavioralFeatures(0.6, 1.4, "night", "bedroom", "variable")
+        
+        assert manager.calculate_similarity(stored, close) > 0.7
+        assert manager.find_matching_entity(close) == entity_id
+        assert manager.calculate_similarity(stored, far) <= 0.7
+        assert manager.find_matching_entity(far) is None
+
+    def test_setting_last_seen_reschedules_expiry(self):
+        """Test writing a stored profile's last_seen is seen by cleanup"""
+        manager = EphemeralIdentityManager(expiry_days=30)
+        features = BehavioralFeatures(1.2, 1.75, "morning", "kitchen", "steady")
+        entity_id, _ = manager.detect_entity(features)
+        
+        manager.entities[entity_id].last_seen = datetime.now() - timedelta(days=35)
+        
+        assert manager.find_matching_entity(features) is None
+        assert manager.cleanup_expired_entities() == 1
+        assert entity_id not in manager.entities
+    
+    def test_profile_updated_outside_manager(self):
+        """Test updating a stored profile directly is seen by matching"""
+        manager = EphemeralIdentityManager()
+        stored = BehavioralFeatures(1.2, 1.75, "morning", "kitchen", "steady")
+        other = BehavioralFeatures(0.6, 1.4, "night", "bedroom", "variable")
+        entity_id, _ = manager.detect_entity(stored)
+        
+        for _ in range(20):
+            manager.entities[entity_id].update(other)
+        
+        assert manager.find_matching_entity(other) == entity_id
+        assert manager.find_matching_entity(stored) is None
+    
+    def test_direct_update_revives_flagged_entity(self):
+        """Test a direct update reschedules an entity already flagged as expired"""
+        manager = EphemeralIdentityManager(expiry_days=30)
+        features = BehavioralFeatures(1.2, 1.75, "morning", "kitchen", "steady")
+        entity_id, _ = manager.detect_entity(features)
+        profile = manager.entities[entity_id]
+        
+        profile.last_seen = datetime.now() - timedelta(days=35)
+        assert manager.find_matching_entity(features) is None
+        
+        profile.update(features)
+        
+        assert manager.find_matching_entity(features) == entity_id
+        assert manager.cleanup_expired_entities() == 0
+        assert entity_id in manager.entities
+    
+    def test_profile_replaced_outside_manager(self):
+        """Test replacing a stored profile under the same key refreshes matching"""
+        manager = EphemeralIdentityManager()
+        stored = BehavioralFeatures(1.2, 1.75, "morning", "kitchen", "steady")
+        other = BehavioralFeatures(0.6, 1.4, "night", "bedroom", "variable")
+        entity_id, _ = manager.detect_entity(stored)
+        
+        now = datetime.now()
+        manager.entities[entity_id] = EntityProfile(
+            entity_id=entity_id,
+            first_observed=now,
+            last_seen=now,
+            observation_count=1,
+            typical_features=other
+        )
+        
+        assert manager.find_matching_entity(stored) is None
+        assert manager.find_matching_entity(other) == entity_id
+    
+    def test_same_size_swap_outside_manager(self):
+        """Test swapping one entity for another keeps the index in sync"""
+        manager = EphemeralIdentityManager()
+        stored = BehavioralFeatures(1.2, 1.75, "morning", "kitchen", "steady")
+        other = BehavioralFeatures(0.6, 1.4, "night", "bedroom", "variable")
+        entity_id, _ = manager.detect_entity(stored)
+        
+        now = datetime.now()
+        del manager.entities[entity_id]
+        manager.entities["swapped"] = EntityProfile(
+            entity_id="swapped",
+            first_observed=now,
+            last_seen=now,
+            observation_count=1,
+            typical_features=other
+        )
+        
+        assert manager.find_matching_entity(stored) is None
+        assert manager.find_matching_entity(other) == "swapped"
+
+
+class TestMatcherKernel:
+    """Test the similarity matching kernel"""
+    
+    def test_loop_and_numpy_kernels_agree(self):
+        """Test the loop kernel and NumPy fallback pick the same row"""
+        rng = np.random.default_rng(0)
+        
+        for _ in range(20):
+            matrix = rng.uniform(0.0, 3.0, size=(50, 5))
+            query = rng.uniform(0.0, 3.0, size=5)
+            expired = rng.random(50) < 0.2
+            
+            idx_loop, sim_loop = _find_best_loop(matrix, query, 0.5, expired)
+            idx_np, sim_np = _find_best_numpy(matrix, query, 0.5, expired)
+            
+            assert idx_loop == idx_np
+            assert sim_loop == pytest.approx(sim_np)
+    
+    def test_no_match_below_threshold(self):
+        """Test kernel reports no match when nothing exceeds the threshold"""
+        matrix = np.array([[0.0, 0.0, 0.0, 0.0, 0.0]])
+        query = np.array([3.0, 3.0, 3.0, 3.0, 3.0])
+        expired = np.zeros(1, dtype=bool)
+        
+        assert _find_best_numpy(matrix, query, 0.85, expired)[0] == -1
+        assert _find_best_loop(matrix, query, 0.85, expired)[0] == -1
+
+    def test_height_prefilter_is_exact(self):
+        """Test skipping rows on height alone never changes the best match"""
+        rng = np.random.default_rng(2)
+
+        for _ in range(50):
+            matrix = rng.uniform(0.0, 2.0, size=(50, 5))
+            query = rng.uniform(0.0, 2.0, size=5)
+            expired = rng.random(50) < 0.2
+
+            # Exhaustive reference: every live row scored in full
+            similarities = 1.0 - np.linalg.norm(matrix - query, axis=1) / MAX_DISTANCE
+            similarities[expired] = 0.0
+            best = int(np.argmax(similarities))
+            expected = best if similarities[best] > 0.9 else -1
+
+            assert _find_best_loop(matrix, query, 0.9, expired)[0] == expected
+            assert _find_best_numpy(matrix, query, 0.9, expired)[0] == expected
+
+    def test_compiled_kernel_agrees_with_loop(self):
+        """Test the optional Cython kernel matches the reference loop"""
+        similarity = pytest.importorskip("examples._similarity")
+        rng = np.random.default_rng(1)
+        
+        for _ in range(20):
+            matrix = rng.uniform(0.0, 3.0, size=(50, 5))
+            query = rng.uniform(0.0, 3.0, size=5)
+            expired = rng.random(50) < 0.2
+            
+            idx_cy, sim_cy = similarity.find_best(matrix, query, 0.5, expired.view(np.uint8))
+            idx_loop, sim_loop = _find_best_loop(matrix, query, 0.5, expired)
+            
+            assert idx_cy == idx_loop
+            assert sim_cy == pytest.approx(sim_loop)
 
 
 class TestPrivacyProperties:
@@ -375,6 +756,16 @@ class TestPrivacyProperties:
         # Should be long enough to be cryptographically random
         assert len(entity_id) > 20
     
+    def test_entity_ids_share_no_linkable_prefix(self):
+        """Verify IDs issued by one manager do not share a common stem"""
+        manager = EphemeralIdentityManager()
+        first, second = (manager.generate_entity_id()[len("entity_"):] for _ in range(2))
+        
+        # A per-manager prefix plus counter would let every ID be linked to
+        # the same manager; each ID must be random throughout
+        assert first[:16] != second[:16]
+        assert first[-8:] != second[-8:]
+    
     def test_no_persistent_event_storage(self):
         """Verify no event history is stored"""
         manager = EphemeralIdentityManager()
@@ -394,7 +785,3 @@ class TestPrivacyProperties:
         assert not hasattr(profile, 'event_history')
         assert not hasattr(profile, 'event_log')
         assert not hasattr(profile, 'observations_list')
-
-
-if __name__ == "__main__":
-    pytest.main([__file__, "-v"])
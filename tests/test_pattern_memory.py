@@ -10,17 +10,14 @@ License: GPL-3.0
 
 import pytest
 import sys
-import os
-from datetime import datetime, timedelta
-
-# Add examples to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import numpy as np
 
 from examples.pattern_memory_demo import (
     TemporalPattern,
     SpatialPattern,
     ActivityPattern,
-    PatternMemory
+    PatternMemory,
+    _DecayClock
 )
 
 
@@ -40,6 +37,17 @@ class TestTemporalPattern:
         assert pattern.active_hours_std == 2.0
         assert pattern.observation_count == 0
     
+    def test_std_derived_from_stored_variance(self):
+        """Test standard deviations are stored as variances and derived on read"""
+        pattern = TemporalPattern(active_hours_std=2.0, typical_duration_std=5.0)
+        
+        assert pattern.active_hours_var == 4.0
+        assert pattern.typical_duration_var == 25.0
+        
+        pattern.active_hours_std = 3.0
+        assert pattern.active_hours_var == 9.0
+        assert pattern.active_hours_std == 3.0
+    
     def test_default_values(self):
         """Test default values for temporal pattern"""
         pattern = TemporalPattern()
@@ -69,6 +77,13 @@ class TestSpatialPattern:
         
         assert len(pattern.zone_frequencies) == 0
         assert pattern.movement_speed_mean == 0.0
+    
+    def test_equality(self):
+        """Test patterns compare by zone visits and movement statistics"""
+        assert SpatialPattern() == SpatialPattern()
+        assert SpatialPattern({"kitchen": 2.0}) == SpatialPattern({"kitchen": 2.0})
+        assert SpatialPattern({"kitchen": 2.0}) != SpatialPattern({"bedroom": 2.0})
+        assert SpatialPattern(movement_speed_mean=1.2) != SpatialPattern()
 
 
 class TestActivityPattern:
@@ -82,6 +97,11 @@ class TestActivityPattern:
         assert isinstance(pattern.temporal, TemporalPattern)
         assert isinstance(pattern.spatial, SpatialPattern)
         assert pattern.success_rate == 0.0
+    
+    def test_equality(self):
+        """Test activity patterns can be compared"""
+        assert ActivityPattern("cooking") == ActivityPattern("cooking")
+        assert ActivityPattern("cooking") != ActivityPattern("sleeping")
 
 
 class TestPatternMemory:
@@ -114,12 +134,13 @@ class TestPatternMemory:
         assert pattern.temporal.observation_count == 0.95
         assert pattern.temporal.active_hours_mean == 7.5
     
-    def test_observe_multiple_same_activity(self):
+    @pytest.mark.parametrize("n", [1, 3, 5, 10])
+    def test_observe_multiple_same_activity(self, n):
         """Test observing same activity multiple times"""
         memory = PatternMemory()
         
-        # Observe breakfast 3 times
-        for _ in range(3):
+        # Observe breakfast n times
+        for _ in range(n):
             memory.observe_activity(
                 activity_type="breakfast",
                 hour=7.5,
@@ -128,12 +149,14 @@ class TestPatternMemory:
                 movement_speed=1.2
             )
         
-        assert memory.total_observations == 3
+        assert memory.total_observations == n
         pattern = memory.patterns["breakfast"]
         
-        # Observation count should be affected by decay
-        assert pattern.temporal.observation_count < 3
-        assert pattern.temporal.observation_count > 2
+        # Observation count should be affected by decay: each observation
+        # has decayed once per observation since, itself included
+        expected = sum(0.95 ** k for k in range(1, n + 1))
+        assert pattern.temporal.observation_count < n
+        assert pattern.temporal.observation_count == pytest.approx(expected)
     
     def test_observe_different_activities(self):
         """Test observing different activity types"""
@@ -153,8 +176,8 @@ class TestPatternMemory:
         memory = PatternMemory(decay_factor=0.98)
         
         # Observe breakfast at consistent time
-        for _ in range(5):
-            memory.observe_activity("breakfast", 7.5, 25.0, "kitchen", 1.2)
+        memory.observe_activities_batch("breakfast", np.full(5, 7.5), np.full(5, 25.0),
+                                        "kitchen", 1.2)
         
         pattern = memory.patterns["breakfast"]
         
@@ -179,6 +202,129 @@ class TestPatternMemory:
         assert "dining_room" in pattern.spatial.zone_frequencies
         assert pattern.spatial.zone_frequencies["kitchen"] > 0.4
     
+    def test_batch_matches_sequential_observation(self):
+        """Test batch observation lands on the same statistics as one-by-one"""
+        hours = [7.5, 7.8, 7.2, 7.6, 7.4]
+        durations = [25.0, 30.0, 22.0, 27.0, 24.0]
+        zones = ["kitchen", "kitchen", "dining_room", "kitchen", "dining_room"]
+        speeds = [1.2, 1.1, 1.3, 1.0, 1.2]
+        
+        sequential = PatternMemory(decay_factor=0.9)
+        batched = PatternMemory(decay_factor=0.9)
+        for memory in (sequential, batched):
+            memory.observe_activity("reading", 14.0, 60.0, "living_room", 0.3)
+        
+        for obs in zip(hours, durations, zones, speeds):
+            sequential.observe_activity("breakfast", *obs)
+        batched.observe_activities_batch("breakfast", hours, durations, zones, speeds)
+        
+        assert batched.total_observations == sequential.total_observations == 6
+        for activity in ("breakfast", "reading"):
+            expected = sequential.patterns[activity]
+            actual = batched.patterns[activity]
+            for name in ("active_hours_mean", "active_hours_std",
+                         "typical_duration_mean", "typical_duration_std",
+                         "observation_count", "pattern_stability"):
+                assert getattr(actual.temporal, name) == pytest.approx(
+                    getattr(expected.temporal, name))
+            assert actual.spatial.zone_frequencies == pytest.approx(
+                expected.spatial.zone_frequencies)
+            assert actual.spatial.movement_speed_mean == pytest.approx(
+                expected.spatial.movement_speed_mean)
+            assert actual.spatial.movement_speed_std == pytest.approx(
+                expected.spatial.movement_speed_std)
+    
+    def test_mixed_batch_matches_sequential_observation(self):
+        """Test a mixed-activity batch lands on the same statistics as one-by-one"""
+        observations = [
+            ("breakfast", 7.5, 25.0, "kitchen", 1.2),
+            ("reading", 9.0, 60.0, "living_room", 0.3),
+            ("breakfast", 7.8, 30.0, "dining_room", 1.1),
+            ("dinner", 18.5, 35.0, "kitchen", 0.0),
+            ("reading", 14.0, 45.0, "bedroom", 0.4),
+            ("breakfast", 7.2, 22.0, "kitchen", 1.3),
+            ("dinner", 19.0, 40.0, "dining_room", 1.0),
+        ]
+        
+        sequential = PatternMemory(decay_factor=0.9)
+        batched = PatternMemory(decay_factor=0.9)
+        for memory in (sequential, batched):
+            memory.observe_activity("reading", 14.0, 60.0, "living_room", 0.3)
+        
+        for obs in observations:
+            sequential.observe_activity(*obs)
+        batched.observe_activities(*zip(*observations))
+        
+        assert batched.total_observations == sequential.total_observations == 8
+        assert list(batched.patterns) == list(sequential.patterns)
+        for activity, expected in sequential.patterns.items():
+            actual = batched.patterns[activity]
+            for name in ("active_hours_mean", "active_hours_std",
+                         "typical_duration_mean", "typical_duration_std",
+                         "observation_count", "pattern_stability"):
+                assert getattr(actual.temporal, name) == pytest.approx(
+                    getattr(expected.temporal, name))
+            assert actual.spatial.zone_frequencies == pytest.approx(
+                expected.spatial.zone_frequencies)
+            assert actual.spatial.movement_speed_mean == pytest.approx(
+                expected.spatial.movement_speed_mean)
+            assert actual.spatial.movement_speed_std == pytest.approx(
+                expected.spatial.movement_speed_std)
+    
+    def test_zone_frequencies_are_probabilities(self):
+        """Test zone frequencies are derived from decayed counts and sum to 1"""
+        memory = PatternMemory(decay_factor=0.9)
+        
+        for zone in ("kitchen", "kitchen", "dining_room", "kitchen"):
+            memory.observe_activity("cooking", 12.0, 30.0, zone, 1.2)
+        
+        spatial = memory.patterns["cooking"].spatial
+        freqs = spatial.zone_frequencies
+        
+        assert sum(freqs.values()) == pytest.approx(1.0)
+        assert spatial.zone_total == pytest.approx(sum(spatial.zone_counts.values()))
+        assert freqs["kitchen"] > freqs["dining_room"]
+    
+    def test_zone_counts_survive_scale_renormalisation(self):
+        """Test zone counts stay correct once the decay scale is folded back in"""
+        memory = PatternMemory(decay_factor=0.9)
+        memory.observe_activity("cooking", 12.0, 30.0, "kitchen", 1.2)
+        memory.observe_activities_batch("other", [9.0] * 3300, [10.0] * 3300, "hallway")
+        memory.observe_activity("cooking", 12.0, 30.0, "dining_room", 1.2)
+        
+        counts = memory.patterns["cooking"].spatial.zone_counts
+        
+        assert counts["kitchen"] == pytest.approx(0.9 ** 3302, rel=1e-9)
+        assert counts["dining_room"] == pytest.approx(0.9)
+    
+    def test_top_zones_ordered_by_frequency(self):
+        """Test top_zones returns the most frequent zones first, capped at k"""
+        spatial = SpatialPattern(
+            zone_frequencies={"bedroom": 0.2, "kitchen": 0.5, "hallway": 0.3}
+        )
+        
+        assert spatial.top_zones() == [
+            ("kitchen", pytest.approx(0.5)),
+            ("hallway", pytest.approx(0.3)),
+            ("bedroom", pytest.approx(0.2)),
+        ]
+        assert [zone for zone, _ in spatial.top_zones(2)] == ["kitchen", "hallway"]
+        assert SpatialPattern().top_zones() == []
+    
+    def test_names_interned_on_first_sight(self):
+        """Test activity and zone names are stored as plain interned strings"""
+        memory = PatternMemory()
+        activity = "".join(["break", "fast"])  # Built at runtime, not interned
+        zone = np.str_("kitchen")
+        
+        memory.observe_activity(activity, 7.5, 25.0, zone, 1.2)
+        
+        stored_activity = next(iter(memory.patterns))
+        stored_zone = memory.patterns["breakfast"].spatial.top_zones()[0][0]
+        assert stored_activity is sys.intern("breakfast")
+        assert type(stored_zone) is str
+        assert stored_zone is sys.intern("kitchen")
+    
     def test_get_pattern_existing(self):
         """Test getting existing pattern"""
         memory = PatternMemory()
@@ -215,8 +361,8 @@ class TestPatternMemory:
         memory = PatternMemory(decay_factor=0.98)
         
         # Establish pattern
-        for _ in range(10):
-            memory.observe_activity("breakfast", 7.5, 25.0, "kitchen", 1.2)
+        memory.observe_activities_batch("breakfast", np.full(10, 7.5), np.full(10, 25.0),
+                                        "kitchen", 1.2)
         
         # Test normal behavior
         is_anomaly, deviation = memory.detect_anomaly("breakfast", 7.5, 25.0)
@@ -226,13 +372,13 @@ class TestPatternMemory:
     
     def test_anomaly_detection_time_anomaly(self):
         """Test anomaly detection for unusual time"""
-        import numpy as np
         memory = PatternMemory(decay_factor=0.98)
 
         # Establish breakfast pattern with slight variations (realistic)
-        for _ in range(10):
-            hour = np.random.normal(7.5, 0.1)  # Small variation
-            memory.observe_activity("breakfast", hour, 25.0, "kitchen", 1.2)
+        rng = np.random.default_rng(42)
+        hours = rng.normal(7.5, 0.1, size=10)  # Small variation
+        memory.observe_activities_batch("breakfast", hours, np.full(10, 25.0),
+                                        "kitchen", 1.2)
 
         # Test very early breakfast
         is_anomaly, deviation = memory.detect_anomaly("breakfast", 5.0, 25.0)
@@ -245,8 +391,8 @@ class TestPatternMemory:
         memory = PatternMemory(decay_factor=0.98)
         
         # Establish pattern with ~25 min duration
-        for _ in range(10):
-            memory.observe_activity("reading", 14.0, 25.0, "living_room", 0.3)
+        memory.observe_activities_batch("reading", np.full(10, 14.0), np.full(10, 25.0),
+                                        "living_room", 0.3)
         
         # Test very long duration
         is_anomaly, deviation = memory.detect_anomaly("reading", 14.0, 120.0)
@@ -254,6 +400,117 @@ class TestPatternMemory:
         # Check deviation is significant
         assert deviation > 0  # Detects the difference
     
+    def test_active_hours_wrap_around_midnight(self):
+        """Test hours either side of midnight average to midnight, not noon"""
+        memory = PatternMemory(decay_factor=1.0)
+        for hour in (23.5, 0.5, 23.5, 0.5):
+            memory.observe_activity("sleeping", hour, 480.0, "bedroom", 0.0)
+        memory.observe_activities_batch("waking", [23.5, 0.5, 23.5, 0.5], [5.0] * 4, "bedroom")
+        
+        for activity in ("sleeping", "waking"):
+            mean = memory.patterns[activity].temporal.active_hours_mean
+            assert min(mean, 24.0 - mean) < 0.5
+            assert memory.patterns[activity].temporal.active_hours_std < 1.5
+        
+        # Midnight fits the routine; noon does not
+        assert memory.detect_anomaly("sleeping", 0.0, 480.0)[0] is False
+        assert memory.detect_anomaly("sleeping", 12.0, 480.0)[0] is True
+    
+    def test_skewed_durations_scored_per_side(self):
+        """Test a long tail widens the spread above the mean, not below"""
+        memory = PatternMemory(decay_factor=1.0)
+        durations = np.tile([20.0, 20.0, 20.0, 20.0, 60.0], 100)
+        memory.observe_activities_batch("bathing", np.full(500, 20.0), durations, "bathroom")
+        
+        temporal = memory.patterns["bathing"].temporal
+        centre, lower, upper = temporal._duration_spread()
+        assert centre == temporal.typical_duration_mean
+        assert upper > lower
+        assert temporal.typical_duration_var == pytest.approx(
+            (lower * lower + upper * upper) / 2)
+        
+        _, long_score = memory.detect_anomaly("bathing", 20.0, centre + 15.0)
+        _, short_score = memory.detect_anomaly("bathing", 20.0, centre - 15.0)
+        
+        assert short_score > long_score
+        
+        _, batch_scores = memory.detect_anomalies(
+            ["bathing", "bathing"], [20.0, 20.0], [centre + 15.0, centre - 15.0])
+        assert batch_scores == pytest.approx([long_score, short_score])
+    
+    def test_old_duration_extremes_fade(self):
+        """Test a one-off extreme duration does not stay in the spread"""
+        memory = PatternMemory(decay_factor=1.0)
+        memory.observe_activity("bathing", 20.0, 300.0, "bathroom")
+        memory.observe_activities_batch("bathing", np.full(100, 20.0), np.full(100, 25.0),
+                                        "bathroom")
+        
+        centre, lower, upper = memory.patterns["bathing"].temporal._duration_spread()
+        
+        assert centre == pytest.approx(25.0)
+        assert max(lower, upper) < 0.01
+        assert memory.detect_anomaly("bathing", 20.0, 200.0)[0] is True
+    
+    @pytest.mark.parametrize("durations, zones, speeds", [
+        ([1.0], ["kitchen"] * 3, [0.1, 0.2, 0.3]),
+        ([1.0, 2.0, 3.0], ["kitchen"] * 2, 1.0),
+        ([1.0, 2.0, 3.0], "kitchen", [0.1, 0.2]),
+    ])
+    def test_batch_rejects_mismatched_lengths(self, durations, zones, speeds):
+        """Test batches must have one duration, zone and speed per hour"""
+        memory = PatternMemory()
+        
+        with pytest.raises(ValueError):
+            memory.observe_activities_batch("walk", [1.0, 2.0, 3.0], durations, zones, speeds)
+        with pytest.raises(ValueError):
+            memory.observe_activities(["walk"] * 3, [1.0, 2.0, 3.0], durations, zones, speeds)
+        with pytest.raises(ValueError):
+            memory.observe_activities(["walk"] * 2, [1.0, 2.0, 3.0], [1.0, 2.0, 3.0], "kitchen")
+        
+        assert memory.patterns == {}
+        assert memory.total_observations == 0
+    
+    def test_batch_statistics_are_python_floats(self):
+        """Test folded statistics are stored as floats, not NumPy scalars"""
+        memory = PatternMemory()
+        memory.observe_activities_batch("reading", np.array([14.0, 15.0]),
+                                        np.array([60.0, 45.0]), "living_room")
+        
+        temporal = memory.patterns["reading"].temporal
+        for name in ("active_hours_mean", "active_hours_var", "typical_duration_mean",
+                     "typical_duration_lower_var", "typical_duration_upper_var"):
+            assert type(getattr(temporal, name)) is float
+        spatial = memory.patterns["reading"].spatial
+        assert type(spatial.movement_speed_mean) is float
+        assert type(spatial.movement_speed_var) is float
+    
+    def test_batch_anomaly_detection_matches_scalar(self):
+        """Test detect_anomalies agrees with detect_anomaly per occurrence"""
+        memory = PatternMemory(decay_factor=0.98)
+        for hour, duration in ((7.2, 20.0), (7.5, 25.0), (7.9, 30.0), (7.4, 27.0)):
+            memory.observe_activity("breakfast", hour, duration, "kitchen", 1.2)
+            memory.observe_activity("reading", hour + 6.0, 60.0, "living_room", 0.3)
+        memory.observe_activity("dinner", 18.5, 35.0, "kitchen", 1.1)
+        
+        queries = [("breakfast", 5.0, 25.0), ("reading", 13.6, 60.0),
+                   ("breakfast", 7.5, 90.0), ("dinner", 3.0, 35.0), ("nap", 15.0, 45.0)]
+        activity_types, hours, durations = zip(*queries)
+        
+        is_anomaly, deviation = memory.detect_anomalies(activity_types, hours, durations)
+        
+        for i, query in enumerate(queries):
+            expected_anomaly, expected_deviation = memory.detect_anomaly(*query)
+            assert is_anomaly[i] == expected_anomaly
+            assert deviation[i] == pytest.approx(expected_deviation)
+        
+        # A single activity type applies to every occurrence
+        hours = [5.0, 7.5, 7.6]
+        durations = [25.0, 90.0, 26.0]
+        is_anomaly, deviation = memory.detect_anomalies("breakfast", hours, durations)
+        expected = memory.detect_anomalies(["breakfast"] * 3, hours, durations)
+        assert np.array_equal(is_anomaly, expected[0])
+        assert np.array_equal(deviation, expected[1])
+    
     def test_decay_mechanism(self):
         """Test that decay reduces observation counts"""
         memory = PatternMemory(decay_factor=0.9)
@@ -269,6 +526,40 @@ class TestPatternMemory:
         # Count should have decayed
         assert count_after_2 < count_after_1
     
+    def test_untouched_pattern_decays_per_observation(self):
+        """Test lazy decay ages an untouched pattern once per observation"""
+        memory = PatternMemory(decay_factor=0.9)
+        
+        memory.observe_activity("activity1", 10.0, 30.0, "zone1", 1.0)
+        for _ in range(5):
+            memory.observe_activity("activity2", 12.0, 20.0, "zone2", 0.8)
+        
+        temporal = memory.patterns["activity1"].temporal
+        assert temporal.observation_count == pytest.approx(0.9 ** 6)
+        assert temporal.pattern_stability == pytest.approx(0.05 * 0.9 ** 6)
+    
+    def test_decay_factor_beyond_lookup_table(self):
+        """Test decay over long gaps falls back to exp rather than clamping"""
+        clock = _DecayClock(0.99)
+        clock.epoch = _DecayClock.TABLE_SIZE + 100
+        
+        assert clock.factor(101) == 0.99 ** (_DecayClock.TABLE_SIZE - 1)
+        assert clock.factor(0) == pytest.approx(0.99 ** clock.epoch)
+        assert clock.factor(0) < clock.factor(1)
+    
+    def test_decay_powers_for_batches(self):
+        """Test batch decay weights come from the table and fall back past it"""
+        clock = _DecayClock(0.9)
+        
+        assert np.allclose(clock.powers(4), [0.9 ** 3, 0.9 ** 2, 0.9, 1.0])
+        assert not clock.powers(4).flags.writeable
+        
+        n = _DecayClock.TABLE_SIZE + 10
+        weights = clock.powers(n)
+        assert len(weights) == n
+        assert weights[-1] == 1.0
+        assert weights[0] == pytest.approx(clock.power(n - 1))
+    
     def test_summarize_patterns(self):
         """Test pattern summarization"""
         memory = PatternMemory()
@@ -284,34 +575,56 @@ class TestPatternMemory:
         assert "reading" in summary.lower()
         assert "PRIVACY PROPERTIES VERIFIED" in summary
 
+    def test_summary_reflects_direct_edits(self):
+        """Test the summary follows patterns edited or replaced in place"""
+        memory = PatternMemory()
+        memory.observe_activity("breakfast", 7.5, 25.0, "kitchen", 1.2)
+        assert "around: 7.5:00" in memory.summarize_patterns()
+        
+        memory.patterns["breakfast"].temporal.active_hours_mean = 8.0
+        assert "around: 8.0:00" in memory.summarize_patterns()
+        
+        memory.patterns["breakfast"] = ActivityPattern("breakfast")
+        assert "around: 12.0:00" in memory.summarize_patterns()
+
+
+@pytest.fixture(scope="class")
+def populated_memory():
+    """Memory with a few observed activities, shared by read-only tests"""
+    memory = PatternMemory()
+    memory.observe_activity("breakfast", 7.5, 25.0, "kitchen", 1.2)
+    memory.observe_activity("breakfast", 7.6, 26.0, "kitchen", 1.1)
+    memory.observe_activity("breakfast", 7.4, 24.0, "kitchen", 1.3)
+    memory.observe_activity("activity", 10.0, 30.0, "kitchen", 1.2)
+    return memory
+
 
 class TestPrivacyProperties:
     """Test privacy-preserving properties of pattern memory"""
     
-    def test_no_event_logs_stored(self):
+    def test_no_event_logs_stored(self, populated_memory):
         """Verify no event logs with timestamps are stored"""
-        memory = PatternMemory()
-        
-        # Observe multiple events
-        memory.observe_activity("breakfast", 7.5, 25.0, "kitchen", 1.2)
-        memory.observe_activity("breakfast", 7.6, 26.0, "kitchen", 1.1)
-        memory.observe_activity("breakfast", 7.4, 24.0, "kitchen", 1.3)
-        
-        pattern = memory.patterns["breakfast"]
-        
-        # Should not have event log
-        assert not hasattr(pattern, 'event_log')
-        assert not hasattr(pattern, 'event_history')
-        assert not hasattr(pattern, 'observations_list')
-        assert not hasattr(memory, 'event_log')
+        pattern = populated_memory.patterns["breakfast"]
+        
+        # Should not have event log. Pattern objects are slotted (see
+        # test_patterns_cannot_grow_extra_fields), so dir() lists every
+        # attribute they can hold
+        log_fields = {'event_log', 'event_history', 'observations_list'}
+        assert log_fields.isdisjoint(dir(pattern))
+        assert not hasattr(populated_memory, 'event_log')
     
-    def test_no_specific_timestamps_stored(self):
+    def test_patterns_cannot_grow_extra_fields(self, populated_memory):
+        """Verify pattern objects are slotted, so no log can be attached later"""
+        pattern = populated_memory.patterns["breakfast"]
+        
+        for obj in (pattern, pattern.temporal, pattern.spatial):
+            assert not hasattr(obj, '__dict__')
+            with pytest.raises(AttributeError):
+                obj.event_log = []
+    
+    def test_no_specific_timestamps_stored(self, populated_memory):
         """Verify specific timestamps are not stored"""
-        memory = PatternMemory()
-        
-        memory.observe_activity("activity", 10.0, 30.0, "zone", 1.0)
-        
-        pattern = memory.patterns["activity"]
+        pattern = populated_memory.patterns["activity"]
         
         # Should only have statistical summaries, not specific times
         assert hasattr(pattern.temporal, 'active_hours_mean')
@@ -354,21 +667,17 @@ class TestPrivacyProperties:
         initial_count = memory.patterns["old_activity"].temporal.observation_count
         
         # Observe many new activities (causing decay)
-        for _ in range(10):
-            memory.observe_activity("new_activity", 15.0, 20.0, "other", 0.8)
+        memory.observe_activities_batch("new_activity", np.full(10, 15.0), np.full(10, 20.0),
+                                        "other", 0.8)
         
         # Old activity should have significantly decayed
         final_count = memory.patterns["old_activity"].temporal.observation_count
         
         assert final_count < initial_count * 0.5  # More than 50% decay
     
-    def test_only_statistical_summaries_stored(self):
+    def test_only_statistical_summaries_stored(self, populated_memory):
         """Verify only statistical summaries are maintained"""
-        memory = PatternMemory()
-        
-        memory.observe_activity("activity", 10.0, 30.0, "kitchen", 1.2)
-        
-        pattern = memory.patterns["activity"]
+        pattern = populated_memory.patterns["activity"]
         
         # Should have statistical measures
         assert hasattr(pattern.temporal, 'active_hours_mean')
@@ -379,16 +688,13 @@ class TestPrivacyProperties:
         assert hasattr(pattern.spatial, 'movement_speed_std')
         
         # Should NOT have raw data
-        assert not hasattr(pattern, 'raw_observations')
-        assert not hasattr(pattern, 'sensor_data')
-        assert not hasattr(pattern, 'detailed_logs')
+        raw_fields = {'raw_observations', 'sensor_data', 'detailed_logs'}
+        for obj in (pattern, pattern.temporal, pattern.spatial):
+            assert raw_fields.isdisjoint(dir(obj))
     
-    def test_privacy_verification_in_summary(self):
+    def test_privacy_verification_in_summary(self, populated_memory):
         """Test that summary includes privacy verification"""
-        memory = PatternMemory()
-        
-        memory.observe_activity("test", 10.0, 30.0, "zone", 1.0)
-        summary = memory.summarize_patterns()
+        summary = populated_memory.summarize_patterns()
         
         # Should include privacy guarantees
         assert "No specific timestamps stored" in summary
@@ -428,19 +734,15 @@ class TestMemoryIntegration:
         memory = PatternMemory(decay_factor=0.98)
         
         # Few observations
-        for _ in range(3):
-            memory.observe_activity("activity", 10.0, 30.0, "zone", 1.0)
+        memory.observe_activities_batch("activity", np.full(3, 10.0), np.full(3, 30.0),
+                                        "zone", 1.0)
         
         stability_low = memory.patterns["activity"].temporal.pattern_stability
         
-        # Many observations
-        for _ in range(17):  # Total 20 observations
-            memory.observe_activity("activity", 10.0, 30.0, "zone", 1.0)
+        # Many observations (total 20)
+        memory.observe_activities_batch("activity", np.full(17, 10.0), np.full(17, 30.0),
+                                        "zone", 1.0)
         
         stability_high = memory.patterns["activity"].temporal.pattern_stability
         
         assert stability_high > stability_low
-
-
-if __name__ == "__main__":
-    pytest.main([__file__, "-v"])